@@ -0,0 +1,307 @@
+"""Benchmarks for phone generation, file output, exports and the GUI table.
+
+    python benchmarks/bench.py [--quick] [--only generation,write,export,gui,startup] [-o results.json]
+    python benchmarks/bench.py --compare baseline.json
+
+Results are printed (or written to ``-o``) as one JSON document; with
+``--compare`` every rate is checked against an earlier results file and the
+exit status is 1 when any benchmark got slower than ``--tolerance``. The
+startup suite also fails the run when a command goes over its time budget.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from phonegen.contacts import generate_contacts  # noqa: E402
+from phonegen.generate import COUNTRIES, GENERATE_ALL, Generate, iter_records  # noqa: E402
+from phonegen.numformat import NUMBER_FORMATS, format_numbers  # noqa: E402
+from phonegen.plan import make_plan  # noqa: E402
+
+SUITES = ["generation", "write", "export", "gui", "startup"]
+
+# Startup budgets in ms on top of a bare `python -c pass`, with the number
+# space cache warm. None of HEAVY_MODULES may be imported on these paths.
+STARTUP_BUDGETS = {
+    "import phonegen.generate": (["-c", "import phonegen.generate"], 50),
+    "python -m phonegen -n 10": (["-m", "phonegen", "-n", "10"], 80),
+    "python -m phonegen -n 10 --all": (["-m", "phonegen", "-n", "10", "--all"], 80),
+}
+HEAVY_MODULES = ["numpy", "pandas", "phonenumbers", "PyQt5", "pyarrow", "multiprocessing"]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def result(name, params, seconds, items, unit, **extra):
+    entry = {"name": name, "params": params, "seconds": round(seconds, 6), "items": items,
+             "rate": round(items / seconds, 1) if seconds else None, "unit": unit}
+    entry.update(extra)
+    return entry
+
+
+def bench_generation(scale):
+    import phonenumbers
+
+    results = []
+    n = 20_000 * scale
+    for country in COUNTRIES:
+        generator = Generate(seed=0)
+        generator.generate_and_validate_phone(country)  # builds the number space
+        seconds, phones = timed(lambda: [generator.generate_and_validate_phone(country) for _ in range(n)])
+        valid = sum(1 for phone in phones if phone and phonenumbers.is_valid_number(phonenumbers.parse(phone)))
+        results.append(result("generate_and_validate_phone", {"country": country}, seconds, n, "numbers/s",
+                              valid_ratio=round(valid / n, 6)))
+
+        seconds, numbers = timed(generator.generate_batch, country, n * 10)
+        sample = numbers[:: max(1, len(numbers) // 1000)]
+        valid = sum(1 for phone in sample if phonenumbers.is_valid_number(phonenumbers.parse(str(phone))))
+        results.append(result("generate_batch", {"country": country}, seconds, len(numbers), "numbers/s",
+                              valid_ratio=round(valid / len(sample), 6)))
+
+        # Checking already generated numbers: full parse vs compiled checks
+        seconds, _ = timed(lambda: [phonenumbers.is_valid_number(phonenumbers.parse(phone, None)) for phone in phones])
+        results.append(result("phonenumbers.is_valid_number", {"country": country}, seconds, n, "numbers/s"))
+        seconds, _ = timed(lambda: [generator.validate_phone(phone) for phone in phones])
+        results.append(result("Generate.validate_phone", {"country": country}, seconds, n, "numbers/s"))
+
+        # Formatted output: compiled layouts against phonenumbers.format_number
+        space = generator.number_space(country)
+        for number_format in NUMBER_FORMATS[1:]:
+            params = {"country": country, "number_format": number_format}
+            phonenumbers_format = getattr(phonenumbers.PhoneNumberFormat, number_format.upper())
+            seconds, formatted = timed(format_numbers, numbers, number_format)
+            sample = range(0, len(numbers), max(1, len(numbers) // 1000))
+            same = sum(1 for i in sample if formatted[i] == phonenumbers.format_number(
+                phonenumbers.parse(str(numbers[i]), None), phonenumbers_format))
+            results.append(result("format_numbers", params, seconds, len(numbers), "numbers/s",
+                                  match_ratio=round(same / len(sample), 6)))
+            formatter = Generate(seed=0, number_format=number_format)
+            seconds, _ = timed(lambda: [formatter.format_phone(phone, space) for phone in phones])
+            results.append(result("Generate.format_phone", params, seconds, n, "numbers/s"))
+            seconds, _ = timed(lambda: [phonenumbers.format_number(phonenumbers.parse(phone, None), phonenumbers_format)
+                                        for phone in phones])
+            results.append(result("phonenumbers.format_number", params, seconds, n, "numbers/s"))
+
+    # Mixed runs: every country's exact quota from one batch draw per country
+    for weights in (None, "KH=5,TH=3,US=1,VN=1"):
+        plan = make_plan(n * 10, weights=weights)
+        seconds, records = timed(lambda: list(iter_records(Generate(seed=0), "KH", GENERATE_ALL, "Auto", plan.total,
+                                                           plan)))
+        counts = {}
+        for country, _, phone in records:
+            counts[country] = counts.get(country, 0) + bool(phone)
+        results.append(result("iter_records", {"language": GENERATE_ALL, "weights": weights}, seconds, len(records),
+                              "records/s", exact_quotas=counts == plan.quotas))
+    return results
+
+
+def load_gui(workdir):
+    # generate003 creates phones_output in the working directory on import
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import generate003
+    finally:
+        os.chdir(cwd)
+    generate003.output_dir = os.path.join(workdir, "phones_output")
+    generate003.checkpoint_path = os.path.join(generate003.output_dir, "checkpoint.json")
+    generate003.stats_path = os.path.join(generate003.output_dir, "run_stats.json")
+    return generate003
+
+
+def output_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+               if name.endswith("_phones.txt"))
+
+
+def bench_write(scale, workdir):
+    gui = load_gui(workdir)
+    results = []
+    n = 50_000 * scale
+    for language, mode in [("Khmer", "Auto"), ("Generate Phone All", "Auto")]:
+        shutil.rmtree(gui.output_dir, ignore_errors=True)
+        os.makedirs(gui.output_dir)
+        worker = gui.WorkerThread("KH", language, mode, n, seed=0)
+        seconds, _ = timed(worker.run)  # run() synchronously, no thread
+        size = output_bytes(gui.output_dir)
+        results.append(result("WorkerThread.run", {"language": language, "records": n}, seconds, n, "records/s",
+                              mb_per_s=round(size / seconds / 1e6, 3)))
+    return results
+
+
+def bench_export(scale, workdir):
+    gui = load_gui(workdir)
+    n = 50_000 * scale
+    rows = generate_contacts(Generate(seed=0), "US", "English", "Auto", n).snapshot()
+    results = []
+    for method, ext in [("export_to_excel", "xlsx"), ("export_to_txt", "txt"), ("export_to_csv", "csv"),
+                        ("export_to_parquet", "parquet")]:
+        path = os.path.join(workdir, f"export.{ext}")
+        # The ExportThread body the GUI export buttons run
+        thread = gui.ExportThread(rows, path)
+        errors = []
+        thread.failed_signal.connect(errors.append)
+        seconds, _ = timed(thread.run)
+        if errors:
+            results.append({"name": method, "params": {"rows": n}, "error": errors[0]})
+            continue
+        results.append(result(method, {"rows": n}, seconds, n, "rows/s", bytes=os.path.getsize(path)))
+    return results
+
+
+def bench_gui(scale, workdir):
+    gui = load_gui(workdir)
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    window = gui.PhoneGeneratorApp()
+    window.show()
+    results = []
+    for n in [1_000, 10_000, 100_000]:
+        rows = [("KH", f"Name {i}", f"+85596{i:07d}") for i in range(n)]
+        for method in ["add_table_row", "add_table_rows"]:
+            window.table_model.clear()
+            app.processEvents()
+            start = time.perf_counter()
+            if method == "add_table_row":
+                for _, name, phone in rows:
+                    window.add_table_row(name, phone)
+            else:
+                for i in range(0, n, gui.EMIT_ROWS):
+                    window.add_table_rows(rows[i:i + gui.EMIT_ROWS])
+            app.processEvents()
+            seconds = time.perf_counter() - start
+            results.append(result(method, {"rows": n}, seconds, n, "rows/s"))
+    window.close()
+    window.table_model.clear()
+    return results
+
+
+def bench_startup(scale, workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT, PHONEGEN_CACHE_DIR=os.path.join(workdir, "cache"))
+    runs = 5 * scale
+
+    def best_ms(args):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *args], env=env, stdout=subprocess.DEVNULL, check=True)
+            times.append(time.perf_counter() - start)
+        return min(times) * 1000
+
+    results = []
+    baseline = best_ms(["-c", "pass"])
+    for name, (args, budget) in STARTUP_BUDGETS.items():
+        shutil.rmtree(env["PHONEGEN_CACHE_DIR"], ignore_errors=True)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, stdout=subprocess.DEVNULL, check=True)
+        cold = (time.perf_counter() - start) * 1000
+        warm = best_ms(args)
+        # Which heavy modules the same command imports
+        trace = subprocess.run([sys.executable, "-X", "importtime", *args], env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True, check=True).stderr
+        imported = {line.rsplit("|", 1)[-1].strip() for line in trace.splitlines() if line.startswith("import time:")}
+        heavy = [module for module in HEAVY_MODULES if module in imported]
+        overhead = warm - baseline
+        results.append(result(name, {}, warm / 1000, 1, "runs/s", overhead_ms=round(overhead, 1),
+                              cold_ms=round(cold, 1), budget_ms=budget, heavy_modules=heavy,
+                              within_budget=overhead <= budget and not heavy))
+    return results
+
+
+def metadata():
+    import numpy
+    import phonenumbers
+
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "revision": revision, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "phonenumbers": phonenumbers.__version__,
+            "numpy": numpy.__version__}
+
+
+def compare(current, baseline, tolerance):
+    def key(entry):
+        return entry["name"], json.dumps(entry["params"], sort_keys=True)
+
+    previous = {key(entry): entry for entry in baseline["results"] if entry.get("rate")}
+    slower = []
+    for entry in current["results"]:
+        old = previous.get(key(entry))
+        if not old or not entry.get("rate"):
+            continue
+        ratio = entry["rate"] / old["rate"]
+        entry["baseline_rate"] = old["rate"]
+        entry["ratio"] = round(ratio, 3)
+        if ratio < 1 - tolerance:
+            slower.append(entry)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the phonegen benchmarks and print JSON results.")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"Comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads, for a fast smoke run")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare rates against an earlier results file")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed slowdown against the baseline (default 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    suites = [suite for suite in args.only.split(",") if suite]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    scale = 1 if args.quick else 10
+
+    report = {"meta": metadata(), "results": []}
+    workdir = tempfile.mkdtemp(prefix="phonegen-bench-")
+    try:
+        for suite in suites:
+            if suite == "generation":
+                report["results"] += bench_generation(scale)
+            else:
+                report["results"] += globals()[f"bench_{suite}"](scale, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            slower = compare(report, json.load(f), args.tolerance)
+        for entry in slower:
+            print(f"slower: {entry['name']} {entry['params']} x{entry['ratio']}", file=sys.stderr)
+        status = 1 if slower else 0
+    for entry in report["results"]:
+        if entry.get("within_budget") is False:
+            print(f"over budget: {entry['name']} {entry['overhead_ms']} ms (budget {entry['budget_ms']} ms), "
+                  f"heavy imports: {', '.join(entry['heavy_modules']) or 'none'}", file=sys.stderr)
+            status = 1
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,8 @@ import os
 import random
 import sys
 import threading
-import phonenumbers
-from phonenumbers.phonenumberutil import NumberParseException
-import pandas as pd
+from phonegen.registry import default_registry
+from phonegen.writer import BufferedWriter
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QComboBox,
     QVBoxLayout, QSpinBox, QTextEdit, QHBoxLayout,
@@ -16,28 +15,18 @@ from PyQt5.QtCore import QThread, pyqtSignal, Qt
 output_dir = "phones_output"
 os.makedirs(output_dir, exist_ok=True)
 
+registry = default_registry()
+
 # Lock for thread-safe file writing
 file_lock = threading.Lock()
 
 def generate_and_validate_phone(country):
-    if country == "KH":
-        phone = random.choice(['+85596', '+85597', '+85588', '+85571']) + str(random.randint(1000000, 9999999))
-    elif country == "TH":
-        phone = random.choice(['+6691', '+6683', '+6686', '+6687']) + str(random.randint(1000000, 9999999))
-    elif country == "US":
-        phone = '+1' + str(random.randint(2000000000, 9999999999))
-    elif country == "VN":
-        phone = random.choice(['+8491', '+8490', '+8488', '+8493']) + str(random.randint(1000000, 9999999))
-    elif country == "JP":
-        phone = '+81' + str(random.randint(70, 90)) + str(random.randint(10000000, 99999999))
-    else:
-        return None
-    try:
-        parsed = phonenumbers.parse(phone, None)
-        if phonenumbers.is_valid_number(parsed):
-            return phone
-    except NumberParseException:
+    # Prefixes and lengths come from phonegen/data/countries.json
+    space = registry.number_space(country)
+    if not space or not space.size:
         return None
+    # Sampled inside the valid ranges, so every draw passes is_valid_number
+    return space.sample()
 
 def random_khmer_name():
     khmer_first_names = ['សុភា', 'ចាន់ដា', 'រ័ត្ន', 'ស្រីពៅ']
@@ -69,20 +58,20 @@ def random_japanese_name():
     japanese_last_names = ['Tanaka', 'Yamamoto', 'Sato', 'Suzuki']
     return random.choice(japanese_first_names), random.choice(japanese_last_names)
 
+name_functions = {
+    "Khmer": random_khmer_name,
+    "Thai": random_thai_name,
+    "English": random_english_name,
+    "Korean": random_korean_name,
+    "Vietnamese": random_vietnamese_name,
+    "Japanese": random_japanese_name,
+}
+
 def get_name_by_language_and_country(language, country):
-    if language == "Khmer":
-        return random_khmer_name()
-    elif language == "Thai":
-        return random_thai_name()
-    elif language == "English":
-        return random_english_name()
-    elif language == "Korean":
-        return random_korean_name()
-    elif language == "Vietnamese":
-        return random_vietnamese_name()
-    elif language == "Japanese":
-        return random_japanese_name()
-    return "Unknown", "Unknown"
+    name_function = name_functions.get(language)
+    if name_function is None:
+        return "Unknown", "Unknown"
+    return name_function()
 
 class WorkerThread(QThread):
     result_signal = pyqtSignal(str)
@@ -98,53 +87,39 @@ class WorkerThread(QThread):
         self.running = True
 
     def run(self):
-        if self.language == "Generate Phone All":
-            countries = ["KH", "TH", "US", "VN", "JP"]
-            for _ in range(self.count):
-                if not self.running:
-                    break
-                country = random.choice(countries)
-                phone = generate_and_validate_phone(country)
-                if not phone:
-                    self.result_signal.emit(f"❌ Invalid phone for {country}")
-                    continue
-                self.result_signal.emit(f"✅ {country}: {phone}")
-                self.table_row_signal.emit("", phone)  # Empty name for generate_phone_all
-                with file_lock:
-                    with open(os.path.join(output_dir, f"{country}_phones.txt"), mode="a", encoding="utf-8") as f:
-                        f.write(phone + "\n")
-        else:
-            for _ in range(self.count):
-                if not self.running:
-                    break
-                phone = generate_and_validate_phone(self.country)
-                if not phone:
-                    self.result_signal.emit(f"❌ Invalid phone for {self.country}")
-                    continue
-
-                if self.mode == "Auto":
-                    if self.country == "KH":
-                        first, last = random_khmer_name()
-                    elif self.country == "TH":
-                        first, last = random_thai_name()
-                    elif self.country == "US":
-                        first, last = random_english_name()
-                    elif self.country == "VN":
-                        first, last = random_vietnamese_name()
-                    elif self.country == "JP":
-                        first, last = random_japanese_name()
+        with BufferedWriter(output_dir, lock=file_lock) as writer:
+            if self.language == "Generate Phone All":
+                countries = registry.countries
+                for _ in range(self.count):
+                    if not self.running:
+                        break
+                    country = random.choice(countries)
+                    phone = generate_and_validate_phone(country)
+                    if not phone:
+                        self.result_signal.emit(f"❌ Invalid phone for {country}")
+                        continue
+                    self.result_signal.emit(f"✅ {country}: {phone}")
+                    self.table_row_signal.emit("", phone)  # Empty name for generate_phone_all
+                    writer.write(f"{country}_phones.txt", phone)
+            else:
+                for _ in range(self.count):
+                    if not self.running:
+                        break
+                    phone = generate_and_validate_phone(self.country)
+                    if not phone:
+                        self.result_signal.emit(f"❌ Invalid phone for {self.country}")
+                        continue
+
+                    if self.mode == "Auto":
+                        first, last = get_name_by_language_and_country(registry.language(self.country), self.country)
                     else:
-                        first, last = "Unknown", "Unknown"
-                else:
-                    first, last = get_name_by_language_and_country(self.language, self.country)
-
-                full_name = f"{first} {last}"
-                line = f"{full_name} - {phone}"
-                self.result_signal.emit(f"✅ {line}")
-                self.table_row_signal.emit(full_name, phone)
-                with file_lock:
-                    with open(os.path.join(output_dir, f"{self.country}_phones.txt"), mode="a", encoding="utf-8") as f:
-                        f.write(line + "\n")
+                        first, last = get_name_by_language_and_country(self.language, self.country)
+
+                    full_name = f"{first} {last}"
+                    line = f"{full_name} - {phone}"
+                    self.result_signal.emit(f"✅ {line}")
+                    self.table_row_signal.emit(full_name, phone)
+                    writer.write(f"{self.country}_phones.txt", line)
         self.finished_signal.emit()
 
 class PhoneGeneratorApp(QWidget):
@@ -160,7 +135,7 @@ class PhoneGeneratorApp(QWidget):
         self.mode_combo.currentIndexChanged.connect(self.mode_changed)
 
         self.countries = QComboBox()
-        self.countries.addItems(["KH", "TH", "US", "VN", "JP"])
+        self.countries.addItems(registry.countries)
 
         self.Get_names = QComboBox()
         self.Get_names.addItems([
@@ -345,6 +320,7 @@ class PhoneGeneratorApp(QWidget):
         try:
             file_path, _ = QFileDialog.getSaveFileName(self, "Save Excel File", os.path.join(output_dir, "exported_phones.xlsx"), "Excel Files (*.xlsx)")
             if file_path:
+                import pandas as pd  # only needed here; keeps startup fast
                 df = pd.DataFrame(self.generated_data, columns=["Name", "Phone"])
                 df.to_excel(file_path, index=False)
                 self.append_result(f"📁 Exported to: {file_path}")
@@ -1,16 +1,22 @@
 import os
-import random
 import sys
 import threading
-import phonenumbers
-from phonenumbers.phonenumberutil import NumberParseException
-import pandas as pd
+import time
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QComboBox,
-    QVBoxLayout, QSpinBox, QTextEdit, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QSizePolicy, QFileDialog
+    QVBoxLayout, QSpinBox, QTextEdit, QHBoxLayout, QLineEdit, QCheckBox,
+    QTableView, QHeaderView, QSizePolicy, QFileDialog, QProgressBar
 )
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtCore import QThread, pyqtSignal, Qt, QAbstractTableModel, QModelIndex
+from phonegen.checkpoint import RunCheckpoint
+from phonegen.contacts import ContactStore
+from phonegen.control import RunControl
+from phonegen.dedup import UniqueIndex
+from phonegen.export import export_store
+from phonegen.generate import Generate, COUNTRIES, LANGUAGES, GENERATE_ALL, format_line, iter_records
+from phonegen.plan import batch_first, make_plan
+from phonegen.stats import RunStats, format_stats
+from phonegen.writer import BufferedWriter
 
 # Output directory
 output_dir = "phones_output"
@@ -19,138 +25,223 @@ os.makedirs(output_dir, exist_ok=True)
 # Lock for thread-safe file writing
 file_lock = threading.Lock()
 
-class Generate:
-    def __init__(self):
-        self.country_phone_prefixes = {
-            "KH": ['+85596', '+85597', '+85588', '+85571'],
-            "TH": ['+6691', '+6683', '+6686', '+6687'],
-            "US": ['+1'],
-            "VN": ['+8491', '+8490', '+8488', '+8493'],
-            "JP": ['+81']
-        }
-        self.name_data = {
-            "Khmer": {
-                "first_names": ['សុភា', 'ចាន់ដា', 'រ័ត្ន', 'ស្រីពៅ'],
-                "last_names": ['ឈឿន', 'សោម', 'សុខ', 'ជាតិ']
-            },
-            "Thai": {
-                "first_names": ['สมชาย', 'สุดา', 'นิรันดร์', 'อนงค์'],
-                "last_names": ['ชัย', 'พันธ์', 'ลิ้ม', 'จันทร์']
-            },
-            "English": {
-                "first_names": ['John', 'Jane', 'Alex', 'Emily'],
-                "last_names": ['Smith', 'Johnson', 'Brown', 'Lee']
-            },
-            "Korean": {
-                "first_names": ['지수', '민호', '현', '수진'],
-                "last_names": ['김', '박', '이', '최']
-            },
-            "Vietnamese": {
-                "first_names": ['Anh', 'Hương', 'Nam', 'Linh'],
-                "last_names": ['Nguyễn', 'Trần', 'Lê', 'Phạm']
-            },
-            "Japanese": {
-                "first_names": ['Hiroshi', 'Yuki', 'Aiko', 'Ken'],
-                "last_names": ['Tanaka', 'Yamamoto', 'Sato', 'Suzuki']
-            }
-        }
-
-    def generate_and_validate_phone(self, country):
-        if country not in self.country_phone_prefixes:
-            return None
-        prefixes = self.country_phone_prefixes[country]
-        if country == "US":
-            phone = prefixes[0] + str(random.randint(2000000000, 9999999999))
-        elif country == "JP":
-            phone = prefixes[0] + str(random.randint(70, 90)) + str(random.randint(10000000, 99999999))
-        else:
-            phone = random.choice(prefixes) + str(random.randint(1000000, 9999999))
-        try:
-            parsed = phonenumbers.parse(phone, None)
-            if phonenumbers.is_valid_number(parsed):
-                return phone
-            return None
-        except NumberParseException:
-            return None
+# Every run saves its resume point here; "Resume" continues the last run
+checkpoint_path = os.path.join(output_dir, "checkpoint.json")
+
+# Counters and timings of the last run
+stats_path = os.path.join(output_dir, "run_stats.json")
+
+# Rows are sent to the UI thread in chunks: every EMIT_ROWS rows or
+# EMIT_INTERVAL seconds, whichever comes first
+EMIT_ROWS = 2000
+EMIT_INTERVAL = 0.1
+
+# Retention: the table keeps the newest TABLE_WINDOW_ROWS rows in memory and
+# spills older ones to a temporary directory (Export and Copy still cover
+# every row); the log pane keeps its last LOG_MAX_LINES lines
+TABLE_WINDOW_ROWS = 100_000
+LOG_MAX_LINES = 5000
 
-    def get_name(self, language, country):
-        if language not in self.name_data:
-            return "Unknown", "Unknown"
-        first_name = random.choice(self.name_data[language]["first_names"])
-        last_name = random.choice(self.name_data[language]["last_names"])
-        return first_name, last_name
-
-    def get_name_by_country(self, country):
-        country_language_map = {
-            "KH": "Khmer",
-            "TH": "Thai",
-            "US": "English",
-            "VN": "Vietnamese",
-            "JP": "Japanese"
-        }
-        language = country_language_map.get(country, "English")
-        return self.get_name(language, country)
+# How long closing the window waits for a running worker to flush and save
+# its checkpoint
+CLOSE_TIMEOUT_MS = 3000
+
+class PhoneTableModel(QAbstractTableModel):
+    # Name/Phone view over the rows the ContactStore holds in memory; Qt
+    # only asks for the cells that are actually visible. Row numbers in the
+    # vertical header count spilled rows too.
+    headers = ["Name", "Phone"]
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows.in_memory
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.rows[self.rows.offset + index.row()][index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        if role == Qt.DisplayRole and orientation == Qt.Vertical:
+            return str(self.rows.offset + section + 1)
+        return super().headerData(section, orientation, role)
+
+    def append_rows(self, rows):
+        # rows are (country, name, phone) records. Rows the store spills to
+        # make room leave the top of the table first.
+        if not rows:
+            return
+        if self.rows.window is not None and len(rows) > self.rows.window:
+            self.beginResetModel()
+            self.rows.extend(rows)
+            self.endResetModel()
+            return
+        spilled = self.rows.spill_count(len(rows))
+        if spilled:
+            self.beginRemoveRows(QModelIndex(), 0, spilled - 1)
+            self.rows.spill(spilled)
+            self.endRemoveRows()
+        first = self.rows.in_memory
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows.clear()
+        self.endResetModel()
 
 class WorkerThread(QThread):
     result_signal = pyqtSignal(str)
-    table_row_signal = pyqtSignal(str, str)
+    table_rows_signal = pyqtSignal(list)
+    stats_signal = pyqtSignal(dict)
     finished_signal = pyqtSignal()
 
-    def __init__(self, country, language, mode, count):
+    def __init__(self, country, language, mode, count, seed=None, unique=False, weights=None, checkpoint=None):
         super().__init__()
         self.country = country
         self.language = language
         self.mode = mode
         self.count = count
-        self.running = True
-        self.generator = Generate()
-
-    def run(self):
-        if self.language == "Generate Phone All":
-            countries = ["KH", "TH", "US", "VN", "JP"]
-            for _ in range(self.count):
-                if not self.running:
-                    break
-                country = random.choice(countries)
-                phone = self.generator.generate_and_validate_phone(country)
-                if not phone:
-                    self.result_signal.emit(f"❌ Invalid phone for {country}")
-                    continue
-                self.result_signal.emit(f"✅ {country}: {phone}")
-                self.table_row_signal.emit("", phone)
-                with file_lock:
-                    with open(os.path.join(output_dir, f"{country}_phones.txt"), mode="a", encoding="utf-8") as f:
-                        f.write(phone + "\n")
+        self.unique = unique
+        # Exact per-country shares of a "Generate Phone All" run; raises
+        # ValueError for a bad mix
+        self.plan = make_plan(count, weights=weights) if language == GENERATE_ALL else None
+        # Pause/resume/cancel from the UI thread; checked after every record
+        self.control = RunControl()
+        self.generator = Generate(seed=seed)
+        if checkpoint is None:
+            countries = self.plan.countries if self.plan else [country]
+            settings = {"country": country, "language": language, "mode": mode, "count": count, "seed": seed,
+                        "unique": unique, "weights": weights}
+            checkpoint = RunCheckpoint(checkpoint_path, output_dir, [f"{c}_phones.txt" for c in countries], settings)
+            checkpoint.save(0, self.generator.checkpoint(), force=True)
         else:
-            for _ in range(self.count):
-                if not self.running:
-                    break
-                phone = self.generator.generate_and_validate_phone(self.country)
-                if not phone:
-                    self.result_signal.emit(f"❌ Invalid phone for {self.country}")
-                    continue
+            self.generator.restore(checkpoint.generator_state)
+        self.checkpoint = checkpoint
+        self.records_done = checkpoint.records_done
+        self.stats = RunStats(count, self.records_done)
+
+    @classmethod
+    def resume(cls, path):
+        # Rebuild the run saved in a checkpoint; output written after the
+        # checkpoint is truncated so the run continues exactly where it was.
+        # None for a finished run, whose files are left alone.
+        checkpoint = RunCheckpoint.load(path)
+        if checkpoint.records_done >= checkpoint.settings["count"]:
+            return None
+        checkpoint.rewind()
+        return cls(checkpoint=checkpoint, **checkpoint.settings)
+
+    def emit_chunk(self, lines, rows):
+        if lines:
+            self.result_signal.emit("\n".join(lines))
+            lines.clear()
+        if rows:
+            self.table_rows_signal.emit(rows[:])
+            rows.clear()
+        self.stats_signal.emit(self.stats.snapshot())
+
+    def save_checkpoint(self, writer=None, force=False):
+        self.checkpoint.save(self.records_done, self.generator.checkpoint(), writer, force)
 
-                if self.mode == "Auto":
-                    first, last = self.generator.get_name_by_country(self.country)
+    def run(self):
+        if self.unique:
+            # Skip every number already in phones_output, including this
+            # run's own output when resuming
+            self.generator.unique = UniqueIndex()
+            # A plan draws its current batch again, so only the output from
+            # before that batch counts
+            position = batch_first(self.records_done) if self.plan else self.records_done
+            self.generator.unique.load([output_dir], stops=self.checkpoint.sizes_at(position))
+        remaining = self.count - self.records_done
+        records = iter_records(self.generator, self.country, self.language, self.mode, remaining, self.plan,
+                               self.records_done)
+        lines, rows = [], []
+        stats = self.stats
+        last_emit = time.monotonic()
+        with BufferedWriter(output_dir, lock=file_lock, on_flush=self.save_checkpoint) as writer:
+            def on_pause():
+                # Everything so far reaches the files and the checkpoint
+                # before blocking, so a paused run can also be closed and
+                # resumed later
+                self.emit_chunk(lines, rows)
+                writer.flush()
+                self.save_checkpoint(force=True)
+                self.result_signal.emit(f"⏸️ Paused at record {self.records_done} of {self.count}")
+                stats.lap("emit")
+
+            stats.bytes_source = lambda: writer.bytes_written
+            stats.reset_lap()
+            for country, full_name, phone in records:
+                if self.plan and self.records_done == batch_first(self.records_done):
+                    self.checkpoint.mark(self.records_done, writer)
+                stats.lap("generate")
+                stats.record(country, bool(phone))
+                # Stop is checked after a record is consumed so the saved
+                # RNG state never runs ahead of records_done
+                self.records_done += 1
+                if phone:
+                    line = format_line(full_name, phone)
+                    if full_name:
+                        lines.append(f"✅ {line}")
+                    else:
+                        lines.append(f"✅ {country}: {phone}")
+                    rows.append((country, full_name, phone))
+                    writer.write(f"{country}_phones.txt", line)
                 else:
-                    first, last = self.generator.get_name(self.language, self.country)
-
-                full_name = f"{first} {last}"
-                line = f"{full_name} - {phone}"
-                self.result_signal.emit(f"✅ {line}")
-                self.table_row_signal.emit(full_name, phone)
-                with file_lock:
-                    with open(os.path.join(output_dir, f"{self.country}_phones.txt"), mode="a", encoding="utf-8") as f:
-                        f.write(line + "\n")
+                    lines.append(f"❌ Invalid phone for {country}")
+                stats.lap("write")
+                if len(rows) >= EMIT_ROWS or time.monotonic() - last_emit >= EMIT_INTERVAL:
+                    self.emit_chunk(lines, rows)
+                    last_emit = time.monotonic()
+                    stats.lap("emit")
+                # Time spent paused is not charged to any phase
+                if not self.control.wait(on_pause, stats.reset_lap):
+                    break
+            self.emit_chunk(lines, rows)
+        self.save_checkpoint(force=True)
+        stats.bytes_source = None
+        stats.finish()
+        stats.dump(stats_path)
+        self.stats_signal.emit(stats.snapshot())
         self.finished_signal.emit()
 
+class ExportThread(QThread):
+    # Writes a snapshot of the table rows off the UI thread
+    done_signal = pyqtSignal(str)
+    failed_signal = pyqtSignal(str)
+
+    def __init__(self, rows, file_path):
+        super().__init__()
+        # Read-only ContactStore snapshot
+        self.rows = rows
+        self.file_path = file_path
+
+    def run(self):
+        # The snapshot is separate from the output files, so the worker's
+        # writer (file_lock) is never held up by a long export
+        try:
+            export_store(self.rows, self.file_path)
+            self.done_signal.emit(self.file_path)
+        except Exception as e:
+            self.failed_signal.emit(str(e))
+
 class PhoneGeneratorApp(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Phone Generator")
         self.setGeometry(100, 100, 600, 450)
        
-        self.generated_data = []
+        self.generated_data = ContactStore(window=TABLE_WINDOW_ROWS)
         self.generated()
 
 
@@ -164,20 +255,29 @@ class PhoneGeneratorApp(QWidget):
         self.mode_combo.currentIndexChanged.connect(self.mode_changed)
 
         self.countries = QComboBox()
-        self.countries.addItems(["KH", "TH", "US", "VN", "JP"])
+        self.countries.addItems(COUNTRIES)
 
         self.Get_names = QComboBox()
-        self.Get_names.addItems([
-            "Khmer", "Thai", "English", "Korean",
-            "Vietnamese", "Japanese", "Generate Phone All"
-        ])
+        self.Get_names.addItems(LANGUAGES + [GENERATE_ALL])
 
         self.get_SpinBox_numbers = QSpinBox()
-        self.get_SpinBox_numbers.setRange(1, 10000)
+        self.get_SpinBox_numbers.setRange(1, 1000000)
         self.get_SpinBox_numbers.setValue(10)
 
+        self.seed_input = QLineEdit()
+        self.seed_input.setPlaceholderText("Seed (optional)")
+        self.mix_input = QLineEdit()
+        self.mix_input.setPlaceholderText("Mix, e.g. KH=2,TH=1")
+        self.mix_input.setToolTip(f"{GENERATE_ALL}: share of the count per country (default: equal)")
+        self.Get_names.currentIndexChanged.connect(self.mode_changed)
+        self.unique_check = QCheckBox("Unique")
+
         self.start_button = QPushButton("Start")
         self.start_button.clicked.connect(self.start)
+        self.resume_button = QPushButton("Resume")
+        self.resume_button.clicked.connect(self.resume)
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.clicked.connect(self.toggle_pause)
         self.stop_button = QPushButton("Stop")
         self.stop_button.clicked.connect(self.stop)
         self.clear_button = QPushButton("Clear")
@@ -188,13 +288,24 @@ class PhoneGeneratorApp(QWidget):
         self.export_button.clicked.connect(self.export_to_excel)
         self.txt_button = QPushButton("Export TXT")
         self.txt_button.clicked.connect(self.export_to_txt)
+        self.csv_button = QPushButton("Export CSV")
+        self.csv_button.clicked.connect(self.export_to_csv)
+        self.parquet_button = QPushButton("Export Parquet")
+        self.parquet_button.clicked.connect(self.export_to_parquet)
 
         self.result_box = QTextEdit()
         self.result_box.setReadOnly(True)
+        self.result_box.document().setMaximumBlockCount(LOG_MAX_LINES)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["Name", "Phone"])
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("Idle")
+        self.last_stats = None
+
+        self.table_model = PhoneTableModel(self.generated_data)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setColumnWidth(0, 200)
@@ -214,10 +325,15 @@ class PhoneGeneratorApp(QWidget):
         Row2 = QHBoxLayout()
         Row2.addWidget(self.Get_names)
         Row2.addWidget(self.get_SpinBox_numbers)
+        Row2.addWidget(self.seed_input)
+        Row2.addWidget(self.mix_input)
+        Row2.addWidget(self.unique_check)
         Row2.addWidget(self.show_hide_)
 
         Row3 = QHBoxLayout()
         Row3.addWidget(self.start_button)
+        Row3.addWidget(self.resume_button)
+        Row3.addWidget(self.pause_button)
         Row3.addWidget(self.stop_button)
         Row3.addWidget(self.clear_button)
 
@@ -226,6 +342,8 @@ class PhoneGeneratorApp(QWidget):
         Row5.addWidget(self.copy_button)
         Row5.addWidget(self.export_button)
         Row5.addWidget(self.txt_button)
+        Row5.addWidget(self.csv_button)
+        Row5.addWidget(self.parquet_button)
 
         # Main Layout
         main_layout = QVBoxLayout()
@@ -233,6 +351,7 @@ class PhoneGeneratorApp(QWidget):
         main_layout.addLayout(Row2)
         main_layout.addWidget(self.result_box)
         main_layout.addWidget(self.table)
+        main_layout.addWidget(self.progress_bar)
         main_layout.addLayout(Row3)
         main_layout.addLayout(Row5)
         self.setLayout(main_layout)
@@ -241,6 +360,7 @@ class PhoneGeneratorApp(QWidget):
         self.show_hide_.setCurrentText("Hide")
         self.show_hide()
         self.worker_thread = None
+        self.export_thread = None
 
     def show_hide(self):
         action = self.show_hide_.currentText()
@@ -252,88 +372,163 @@ class PhoneGeneratorApp(QWidget):
 
     def mode_changed(self):
         self.Get_names.setEnabled(self.mode_combo.currentText() != "Auto")
+        self.mix_input.setEnabled(self.Get_names.currentText() == GENERATE_ALL)
 
     def start(self):
         if self.worker_thread and self.worker_thread.isRunning():
             self.append_result("⚠️ Generation already in progress.")
             return
         self.result_box.clear()
-        self.generated_data.clear()
-        self.table.setRowCount(0)
+        self.table_model.clear()
 
         selected_country = self.countries.currentText()
         selected_language = self.Get_names.currentText()
         mode = self.mode_combo.currentText()
         count = self.get_SpinBox_numbers.value()
+        seed_text = self.seed_input.text().strip()
+        if seed_text and not seed_text.lstrip("-").isdigit():
+            self.append_result("⚠️ Seed must be a whole number.")
+            return
+        seed = int(seed_text) if seed_text else None
 
-        self.worker_thread = WorkerThread(selected_country, selected_language, mode, count)
+        unique = self.unique_check.isChecked()
+        weights = self.mix_input.text().strip() or None
+
+        try:
+            worker = WorkerThread(selected_country, selected_language, mode, count, seed, unique, weights)
+        except ValueError as e:
+            self.append_result(f"⚠️ Mix: {e}")
+            return
+        self.run_worker(worker)
+
+    def resume(self):
+        if self.worker_thread and self.worker_thread.isRunning():
+            self.append_result("⚠️ Generation already in progress.")
+            return
+        if not os.path.exists(checkpoint_path):
+            self.append_result("⚠️ No run to resume.")
+            return
+        worker = WorkerThread.resume(checkpoint_path)
+        if worker is None:
+            self.append_result("⚠️ Last run already completed.")
+            return
+        self.result_box.clear()
+        self.table_model.clear()
+        self.append_result(f"⏯️ Resuming at record {worker.records_done} of {worker.count}")
+        self.run_worker(worker)
+
+    def run_worker(self, worker):
+        self.worker_thread = worker
         self.worker_thread.result_signal.connect(self.append_result)
-        self.worker_thread.table_row_signal.connect(self.add_table_row)
+        self.worker_thread.table_rows_signal.connect(self.add_table_rows)
+        self.worker_thread.stats_signal.connect(self.update_progress)
+        self.progress_bar.setRange(0, worker.count)
+        self.progress_bar.setValue(worker.records_done)
+        self.progress_bar.setFormat("%v / %m")
         self.worker_thread.finished_signal.connect(self.on_worker_finished)
         self.worker_thread.start()
 
+    def toggle_pause(self):
+        if not (self.worker_thread and self.worker_thread.isRunning()):
+            self.append_result("⚠️ No generation in progress")
+            return
+        control = self.worker_thread.control
+        if control.paused:
+            control.resume()
+            self.pause_button.setText("Pause")
+            self.append_result("▶️ Continuing")
+        else:
+            control.pause()
+            self.pause_button.setText("Continue")
+
     def stop(self):
         if self.worker_thread and self.worker_thread.isRunning():
-            self.worker_thread.running = False
+            # The worker flushes its output and saves a checkpoint, so
+            # "Resume" can pick the run up again
+            self.worker_thread.control.cancel()
+            self.pause_button.setText("Pause")
             self.append_result("⏹️ Stopped by user")
         else:
             self.append_result("⚠️ No generation in progress")
 
+    def closeEvent(self, event):
+        if self.worker_thread and self.worker_thread.isRunning():
+            self.worker_thread.control.cancel()
+            self.worker_thread.wait(CLOSE_TIMEOUT_MS)
+        super().closeEvent(event)
+
     def clear(self):
         self.result_box.clear()
-        self.generated_data.clear()
-        self.table.setRowCount(0)
+        self.table_model.clear()
         self.append_result("🗑️ Cleared results")
 
     def append_result(self, text):
         self.result_box.append(text)
 
     def add_table_row(self, name, phone):
-        self.generated_data.append((name, phone))
-        row_pos = self.table.rowCount()
-        self.table.insertRow(row_pos)
-        self.table.setItem(row_pos, 0, QTableWidgetItem(name))
-        self.table.setItem(row_pos, 1, QTableWidgetItem(phone))
+        self.add_table_rows([("", name, phone)])
+
+    def add_table_rows(self, rows):
+        self.table_model.append_rows(rows)
+
+    def update_progress(self, stats):
+        self.last_stats = stats
+        self.progress_bar.setValue(stats["done"])
+        text = f"%v / %m  ·  {stats['records_per_sec']:,.0f}/s"
+        if stats["eta"] is not None and stats["done"] < stats["total"]:
+            text += f"  ·  ETA {stats['eta']:.0f}s"
+        if stats["invalid"]:
+            text += f"  ·  {stats['invalid']} invalid"
+        self.progress_bar.setFormat(text)
 
     def on_worker_finished(self):
+        cancelled = self.worker_thread.control.cancelled
         self.worker_thread = None
-        self.append_result("✅ Generation completed")
+        self.pause_button.setText("Pause")
+        if cancelled:
+            self.append_result("⏹️ Generation stopped; press Resume to continue")
+        else:
+            self.append_result("✅ Generation completed")
+        if self.last_stats:
+            self.append_result(f"📊 {format_stats(self.last_stats)} (saved to {stats_path})")
 
     def copy_to_clipboard(self):
-        if not self.result_box.toPlainText():
+        # Every generated row, spilled ones included, as in the TXT files
+        if not self.generated_data:
             self.append_result("⚠️ Nothing to copy.")
             return
-        clipboard = QApplication.clipboard()
-        clipboard.setText(self.result_box.toPlainText())
-        self.append_result("📋 Copied to clipboard!")
+        rows = self.generated_data.snapshot().iter_rows()
+        QApplication.clipboard().setText("\n".join(format_line(name, phone) for name, phone in rows))
+        self.append_result(f"📋 Copied {len(self.generated_data)} rows to clipboard!")
 
-    def export_to_excel(self):
+    def start_export(self, title, default_name, file_filter, label):
         if not self.generated_data:
             self.append_result("⚠️ No data to export.")
             return
-        try:
-            file_path, _ = QFileDialog.getSaveFileName(self, "Save Excel File", os.path.join(output_dir, "exported_phones.xlsx"), "Excel Files (*.xlsx)")
-            if file_path:
-                df = pd.DataFrame(self.generated_data, columns=["Name", "Phone"])
-                df.to_excel(file_path, index=False)
-                self.append_result(f"📁 Exported to: {file_path}")
-        except Exception as e:
-            self.append_result(f"❌ Export failed: {str(e)}")
+        if self.export_thread and self.export_thread.isRunning():
+            self.append_result("⚠️ Export already in progress.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, title, os.path.join(output_dir, default_name), file_filter)
+        if not file_path:
+            return
+        # Snapshot so the export isn't affected by rows still arriving
+        self.export_thread = ExportThread(self.generated_data.snapshot(), file_path)
+        self.export_thread.done_signal.connect(lambda path: self.append_result(f"📁 Exported to: {path}"))
+        self.export_thread.failed_signal.connect(lambda error: self.append_result(f"❌ {label} failed: {error}"))
+        self.export_thread.start()
+        self.append_result(f"⏳ Exporting {len(self.export_thread.rows)} rows...")
+
+    def export_to_excel(self):
+        self.start_export("Save Excel File", "exported_phones.xlsx", "Excel Files (*.xlsx)", "Export")
 
     def export_to_txt(self):
-        if not self.generated_data:
-            self.append_result("⚠️ No data to export.")
-            return
-        try:
-            file_path, _ = QFileDialog.getSaveFileName(self, "Save TXT File", os.path.join(output_dir, f"{self.countries.currentText()}_phones.txt"), "Text Files (*.txt)")
-            if file_path:
-                with file_lock:
-                    with open(file_path, mode="w", encoding="utf-8") as f:
-                        for name, phone in self.generated_data:
-                            f.write(f"{name} - {phone}\n")
-                self.append_result(f"📁 Exported to: {file_path}")
-        except Exception as e:
-            self.append_result(f"❌ TXT Export failed: {str(e)}")
+        self.start_export("Save TXT File", f"{self.countries.currentText()}_phones.txt", "Text Files (*.txt)", "TXT Export")
+
+    def export_to_csv(self):
+        self.start_export("Save CSV File", "exported_phones.csv", "CSV Files (*.csv)", "CSV Export")
+
+    def export_to_parquet(self):
+        self.start_export("Save Parquet File", "exported_phones.parquet", "Parquet Files (*.parquet)", "Parquet Export")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1 @@
+from phonegen.ranges import NumberSpace, number_space
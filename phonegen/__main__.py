@@ -0,0 +1,5 @@
+import sys
+
+from phonegen.cli import main
+
+sys.exit(main())
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+
+def rng_state(rng):
+    # random.Random state as JSON-friendly lists
+    version, internal, gauss_next = rng.getstate()
+    return [version, list(internal), gauss_next]
+
+
+def set_rng_state(rng, state):
+    version, internal, gauss_next = state
+    rng.setstate((version, tuple(internal), gauss_next))
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+class RunCheckpoint:
+    """Resume point of a seeded run, stored as JSON next to its output.
+
+    Holds the number of records done, the generator state after the last of
+    them and the size of every output file at that moment. ``rewind``
+    truncates anything written after the checkpoint, so a resumed run
+    continues at record ``records_done`` without duplicates or gaps.
+    Saves are written at most every ``interval`` seconds unless forced.
+    ``mark`` also keeps the sizes where the current plan batch started,
+    since a resumed plan draws that batch again (see ``sizes_at``).
+    """
+
+    def __init__(self, path, directory, filenames=(), settings=None, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self.last_saved = None
+        self.directory = directory
+        self.settings = settings or {}
+        self.records_done = 0
+        self.generator_state = None
+        self.sizes = {name: _file_size(os.path.join(directory, name)) for name in filenames}
+        self.batch_mark = None
+
+    def save(self, records_done, generator_state=None, writer=None, force=False):
+        if writer is not None:
+            self.sizes.update(writer.positions())
+        now = time.monotonic()
+        if not force and self.last_saved is not None and now - self.last_saved < self.interval:
+            return
+        self.last_saved = now
+        self.records_done = records_done
+        self.generator_state = generator_state
+        data = {
+            "directory": self.directory,
+            "settings": self.settings,
+            "records_done": records_done,
+            "generator": generator_state,
+            "sizes": self.sizes,
+            "batch_mark": self.batch_mark,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def mark(self, records_done, writer=None):
+        # Called before the first record of a plan batch is written
+        if writer is not None:
+            writer.flush()
+            self.sizes.update(writer.positions())
+        self.batch_mark = [records_done, dict(self.sizes)]
+
+    def sizes_at(self, records_done):
+        """Output sizes (by absolute path) after ``records_done`` records.
+
+        Known at the checkpoint itself and at the last ``mark``; None
+        otherwise.
+        """
+        if records_done == self.records_done:
+            sizes = self.sizes
+        elif self.batch_mark and self.batch_mark[0] == records_done:
+            sizes = self.batch_mark[1]
+        else:
+            return None
+        return {os.path.abspath(os.path.join(self.directory, name)): size for name, size in sizes.items()}
+
+    def rewind(self):
+        for name, size in self.sizes.items():
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        checkpoint = cls(path, data["directory"], settings=data["settings"])
+        checkpoint.records_done = data["records_done"]
+        checkpoint.generator_state = data["generator"]
+        checkpoint.sizes = data["sizes"]
+        checkpoint.batch_mark = data.get("batch_mark")
+        return checkpoint
@@ -0,0 +1,311 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+from phonegen.checkpoint import RunCheckpoint
+from phonegen.control import RunCancelled, RunControl
+from phonegen.generate import (COUNTRIES, FIELDS, FORMATS, LANGUAGES, GENERATE_ALL, Generate, iter_lines,
+                               iter_records)
+from phonegen.numformat import NUMBER_FORMATS
+from phonegen.plan import PLAN_ORDERS, batch_first, make_plan
+from phonegen.registry import default_registry
+from phonegen.shard import node_seed, parse_shard
+from phonegen.stats import RunStats, format_stats, instrument
+from phonegen.writer import BufferedWriter
+
+# numpy, the process pool and the columnar export code are imported only on
+# the paths that use them, so a plain `python -m phonegen -n 10` starts fast
+
+# Columnar formats go through phonegen.export and need a file output
+EXPORT_ONLY_FORMATS = ["parquet", "xlsx"]
+
+# Settings stored in a checkpoint so --resume can rebuild the same run
+RUN_SETTINGS = ["country", "language", "mode", "count", "output", "format", "seed", "unique", "exclude", "names",
+                "number_format", "quotas", "weights", "plan_order", "shard", "permute"]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="phonegen", description="Generate valid phone numbers and names without the GUI.")
+    parser.add_argument("-c", "--country", type=str.upper, default="KH",
+                        help=f"Any phonenumbers region code (configured: {', '.join(COUNTRIES)})")
+    parser.add_argument("-l", "--language", choices=LANGUAGES + [GENERATE_ALL], default="Khmer",
+                        help="Name language (only used in All mode)")
+    parser.add_argument("--all", action="store_true", help=f"Same as --language '{GENERATE_ALL}'")
+    parser.add_argument("-m", "--mode", choices=["Auto", "All"], default="Auto",
+                        help="Auto picks the name language from the country")
+    parser.add_argument("-n", "--count", type=int, default=10)
+    shares = parser.add_mutually_exclusive_group()
+    shares.add_argument("--quotas", metavar="CC=N,...",
+                        help="Exact records per country, e.g. KH=5000,TH=3000 (implies --all, sets the count)")
+    shares.add_argument("--weights", metavar="CC=W,...",
+                        help="Split --count between countries by weight, e.g. KH=2,TH=1 (implies --all)")
+    parser.add_argument("--plan-order", choices=PLAN_ORDERS, default="interleave",
+                        help="Mix the countries of an --all run, or write them one after the other")
+    parser.add_argument("-o", "--output", default="-", help="Output file, '-' for stdout")
+    parser.add_argument("-f", "--format", choices=FORMATS + EXPORT_ONLY_FORMATS, default="txt")
+    parser.add_argument("--number-format", choices=NUMBER_FORMATS, default="e164",
+                        help="How numbers are written in txt/csv/jsonl output")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Generate in this many processes (0 = one per CPU core)")
+    parser.add_argument("-s", "--seed", type=int, help="Seed for a reproducible run")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Draw only from shard I of N of the number space, so N nodes never overlap "
+                             "(see phonegen.shard)")
+    parser.add_argument("--checkpoint", help="Save a resume checkpoint to this file (file output only)")
+    parser.add_argument("--resume", metavar="CHECKPOINT", help="Continue the run saved in CHECKPOINT")
+    parser.add_argument("-u", "--unique", action="store_true", help="Never output the same number twice")
+    parser.add_argument("--permute", action="store_true",
+                        help="Walk each country's numbers in a seeded random order: no repeats until all are used, "
+                             "in constant memory")
+    parser.add_argument("-x", "--exclude", action="append", default=[], metavar="PATH",
+                        help="With --unique, also skip numbers found in this file or directory (repeatable)")
+    parser.add_argument("--fields", default="country,name,phone",
+                        help=f"Columns for parquet/xlsx output, from: {','.join(FIELDS)}")
+    parser.add_argument("--stats-interval", type=float, metavar="SECONDS",
+                        help="Print progress and throughput to stderr this often")
+    parser.add_argument("--stats-json", metavar="FILE", help="Write run statistics as JSON to FILE at the end")
+    parser.add_argument("--names", metavar="DIR",
+                        help="Directory of weighted name corpora (default: $PHONEGEN_NAMES_DIR)")
+    return parser
+
+
+def report_stats(stats):
+    print(format_stats(stats.snapshot()), file=sys.stderr, flush=True)
+
+
+def instrumented(args, records, stats):
+    if stats is None:
+        return records
+    on_report = report_stats if args.stats_interval else None
+    return instrument(records, stats, on_report, args.stats_interval or 1.0)
+
+
+def counted_lines(lines, stats):
+    for line in lines:
+        stats.bytes_written += len(line.encode("utf-8"))
+        yield line
+
+
+def finish_stats(args, stats):
+    if stats is None:
+        return
+    stats.finish()
+    if args.stats_interval:
+        report_stats(stats)
+    if args.stats_json:
+        stats.dump(args.stats_json)
+
+
+def cancel_on_interrupt(control):
+    # First Ctrl+C stops the run cleanly (output flushed, checkpoint saved),
+    # a second one interrupts at once
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("Stopping... (Ctrl+C again to abort)", file=sys.stderr, flush=True)
+        control.cancel()
+
+    signal.signal(signal.SIGINT, interrupt)
+
+
+def report_cancel(checkpoint=None, done=None):
+    message = "Cancelled" if done is None else f"Cancelled after {done} records"
+    if checkpoint:
+        message += f"; continue with --resume {checkpoint.path}"
+    print(message, file=sys.stderr, flush=True)
+
+
+def write_file(args, generator, checkpoint, stats=None, control=None, plan=None):
+    directory, filename = os.path.split(os.path.abspath(args.output))
+    start = checkpoint.records_done if checkpoint else 0
+    done = start
+
+    def save_checkpoint(writer):
+        checkpoint.save(done, generator.checkpoint(), writer)
+
+    on_flush = save_checkpoint if checkpoint else None
+    with BufferedWriter(directory, on_flush=on_flush, newline="\n") as writer:
+        if stats is not None:
+            stats.bytes_source = lambda: writer.bytes_written
+        if start == 0 and args.format == "csv":
+            writer.write(filename, "country,name,phone")
+        records = iter_records(generator, args.country, args.language, args.mode, args.count - start, plan, start)
+        for record in instrumented(args, records, stats):
+            if checkpoint and plan is not None and done == batch_first(done):
+                checkpoint.mark(done, writer)
+            done += 1
+            if record[2]:
+                for line in iter_lines([record], args.format, header=False):
+                    writer.write(filename, line[:-1])
+            # Checked once the record is written, like the GUI worker, so the
+            # checkpoint below matches the output exactly
+            if control is not None and not control.wait():
+                break
+    if checkpoint:
+        checkpoint.save(done, generator.checkpoint(), force=True)
+    return done
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.all or args.quotas or args.weights:
+        args.language = GENERATE_ALL
+
+    checkpoint = None
+    if args.resume:
+        checkpoint = RunCheckpoint.load(args.resume)
+        for key, value in checkpoint.settings.items():
+            setattr(args, key, value)
+        checkpoint.rewind()
+    if args.country not in default_registry():
+        parser.error(f"unknown country: {args.country}")
+    if (args.checkpoint or args.resume) and (args.output == "-" or args.workers != 1):
+        parser.error("checkpoints need --output FILE and a single worker")
+    missing = [path for path in args.exclude if not os.path.exists(path)]
+    if missing:
+        parser.error(f"no such file to exclude: {', '.join(missing)}")
+    if args.unique and args.workers != 1:
+        parser.error("--unique needs a single worker")
+    if args.format in EXPORT_ONLY_FORMATS and (args.output == "-" or args.workers != 1 or args.checkpoint):
+        parser.error(f"--format {args.format} needs --output FILE and a single worker, without checkpoints")
+    if args.format in EXPORT_ONLY_FORMATS and args.number_format != "e164":
+        parser.error(f"--format {args.format} takes formatted numbers as --fields (national, international, rfc3966)")
+    if args.unique and (args.checkpoint or args.resume) and args.number_format != "e164":
+        # Resuming reloads the numbers already written, which needs E.164
+        parser.error("--unique with checkpoints needs --number-format e164")
+    plan = None
+    if args.language == GENERATE_ALL:
+        try:
+            plan = make_plan(args.count, args.quotas, args.weights, args.plan_order)
+        except ValueError as e:
+            parser.error(str(e))
+        args.count = plan.total
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    seed = node_seed(args.seed, shard)
+    fields = args.fields.split(",")
+    if set(fields) - set(FIELDS):
+        parser.error(f"unknown fields: {', '.join(sorted(set(fields) - set(FIELDS)))}")
+
+    stats = None
+    if args.stats_interval or args.stats_json:
+        stats = RunStats(args.count, checkpoint.records_done if checkpoint else 0)
+    control = RunControl(shared=args.workers != 1)
+    cancel_on_interrupt(control)
+
+    if args.workers != 1:
+        on_chunk = None
+        if stats is not None:
+            # Worker output only reports finished chunks of valid records
+            next_report = stats.started + (args.stats_interval or 0)
+
+            def on_chunk(counts, nbytes):
+                nonlocal next_report
+                for country, n in counts.items():
+                    stats.add_records(country, n, n)
+                stats.bytes_written += nbytes
+                if args.stats_interval and time.perf_counter() >= next_report:
+                    report_stats(stats)
+                    next_report = time.perf_counter() + args.stats_interval
+
+        from phonegen.pool import generate_to_stream
+        output = sys.stdout.buffer if args.output == "-" else open(args.output, mode="wb")
+        try:
+            generate_to_stream(output, args.country, args.language, args.mode, args.count, args.format,
+                               workers=args.workers or None, seed=seed, names_dir=args.names,
+                               on_chunk=on_chunk, control=control, number_format=args.number_format, plan=plan,
+                               shard=shard, permute=args.permute)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        finish_stats(args, stats)
+        if control.cancelled:
+            report_cancel()
+            return 130
+        return 0
+
+    unique = None
+    if args.unique:
+        from phonegen.dedup import UniqueIndex
+        unique = UniqueIndex()
+
+        def warn_empty(path):
+            print(f"warning: no E.164 numbers in {path}, so it excludes nothing "
+                  f"(--exclude reads numbers written as +<country code><number>)", file=sys.stderr, flush=True)
+
+        unique.load(args.exclude, on_empty=warn_empty)
+        if checkpoint:
+            # The rewound output holds exactly the numbers drawn so far. A
+            # plan draws its current batch again, so only the output from
+            # before that batch goes into the index.
+            position = batch_first(checkpoint.records_done) if plan is not None else checkpoint.records_done
+            unique.load([args.output], stops=checkpoint.sizes_at(position))
+
+    generator = Generate(seed=seed, unique=unique, names_dir=args.names, number_format=args.number_format,
+                         shard=shard, permute=args.permute)
+    if args.output == "-":
+        records = iter_records(generator, args.country, args.language, args.mode, args.count, plan)
+        records = (record for record in control.check(instrumented(args, records, stats)) if record[2])
+        lines = iter_lines(records, args.format)
+        try:
+            sys.stdout.writelines(counted_lines(lines, stats) if stats is not None else lines)
+        except RunCancelled:
+            pass
+        sys.stdout.flush()
+        finish_stats(args, stats)
+        if control.cancelled:
+            report_cancel(done=stats.snapshot()["done"] if stats is not None else None)
+            return 130
+        return 0
+
+    if args.format in EXPORT_ONLY_FORMATS:
+        # The run is built as columnar ContactStores with batch draws, one
+        # chunk at a time, each written out before the next is generated
+        import numpy as np
+        from phonegen.contacts import iter_contact_chunks
+        from phonegen.export import export_stores
+
+        def counted(stores):
+            for store in stores:
+                if stats is not None:
+                    stats.lap("generate")
+                    for code, n in enumerate(np.bincount(store.countries[:len(store)]).tolist()):
+                        if n:
+                            stats.add_records(store.country_values[code], n, n)
+                yield store
+                if stats is not None:
+                    stats.lap("write")
+
+        stores = iter_contact_chunks(generator, args.country, args.language, args.mode, args.count, plan)
+        export_stores(counted(stores), args.output, fields, args.format, columns=fields)
+        if stats is not None:
+            stats.lap("write")
+            stats.bytes_written = os.path.getsize(args.output)
+        finish_stats(args, stats)
+        return 0
+
+    if checkpoint:
+        generator.restore(checkpoint.generator_state)
+    else:
+        open(args.output, mode="w").close()
+        if args.checkpoint:
+            directory, filename = os.path.split(os.path.abspath(args.output))
+            settings = {key: getattr(args, key) for key in RUN_SETTINGS}
+            checkpoint = RunCheckpoint(args.checkpoint, directory, [filename], settings)
+            checkpoint.save(0, generator.checkpoint(), force=True)
+    done = write_file(args, generator, checkpoint, stats, control, plan)
+    finish_stats(args, stats)
+    if control.cancelled:
+        report_cancel(checkpoint, done)
+        return 130
+    return 0
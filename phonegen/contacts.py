@@ -0,0 +1,394 @@
+import os
+import unicodedata
+
+import numpy as np
+
+from phonegen.dedup import phone_keys
+from phonegen.generate import DEFAULT_FIELDS, FIELDS, GENERATE_ALL  # noqa: F401 (FIELDS re-exported)
+from phonegen.numformat import format_numbers
+from phonegen.plan import BATCH_SIZE, iter_plan_batches, make_plan
+
+# Contacts are kept column by column in NumPy arrays instead of a list of
+# tuples: the phone as its E.164 integer key (uint64), the country and the
+# full name as codes into append-only value lists (names repeat a lot). That
+# is 14 bytes per record plus the distinct names. Every other field is
+# derived from those three when it is read:
+#
+#   name, phone, country    stored
+#   line_type               "mobile", "fixed_line", ... (phonenumbers' number_type)
+#   national, international,
+#   rfc3966                 formatted as phonenumbers would (phonegen.numformat)
+#   email                   built from the name and phone, on example.com
+
+INITIAL_CAPACITY = 1024
+ROWS_PER_CHUNK = 10_000
+# Rows generated at a time by iter_contact_chunks; whole plan batches, so
+# no batch is drawn twice
+GENERATE_CHUNK = 10 * BATCH_SIZE
+STORED_COLUMNS = ("phones", "countries", "names")
+
+# A store with a ``window`` keeps only its newest rows in memory. Whenever
+# the window fills up, its oldest quarter is appended to one raw file per
+# stored column in a temporary directory, so memory stays flat however long
+# the run. Everything that reads rows by index (columns, iter_rows, exports)
+# reads spilled rows back from those files.
+
+
+class _SpillFiles:
+    # Append-only column files of the rows moved out of memory; the
+    # directory is removed once no store or snapshot uses it any more
+
+    def __init__(self, parent=None):
+        import shutil
+        import tempfile
+        import weakref
+        self.path = tempfile.mkdtemp(prefix="phonegen-contacts-", dir=parent)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.path, True)
+
+    def append(self, column, values):
+        with open(os.path.join(self.path, column), mode="ab") as f:
+            values.tofile(f)
+
+    def read(self, column, dtype, start, stop):
+        return np.fromfile(os.path.join(self.path, column), dtype=dtype, count=stop - start,
+                           offset=start * dtype.itemsize)
+
+
+class ContactStore:
+    """Growable columnar table of generated contacts.
+
+    ``store[i]`` is the ``(name, phone)`` row the GUI table shows. Slices
+    of the columns are NumPy views, so handing a snapshot to an export
+    thread or to pandas copies no per-record objects. With ``window`` only
+    the newest rows stay in memory (rows ``offset:len(store)``) and older
+    ones are spilled to a temporary directory under ``spill_dir``.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY, window=None, spill_dir=None):
+        self.size = 0
+        self.offset = 0
+        self.window = window
+        self.spill_dir = spill_dir
+        self._spill = None
+        if window is not None:
+            capacity = min(capacity, window)
+        self.phones = np.zeros(capacity, dtype=np.uint64)
+        self.countries = np.zeros(capacity, dtype=np.uint16)
+        self.names = np.zeros(capacity, dtype=np.uint32)
+        self.name_values = []
+        self.name_codes = {}
+        self.country_values = []
+        self.country_codes = {}
+        self.read_only = False
+        self._validator = None
+        self._line_types = np.zeros(0, dtype=np.uint8)
+        self._line_type_values = []
+        self._value_arrays = {}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        return self.name(i), self.phone(i)
+
+    def name(self, i):
+        return self.name_values[self._value("names", i)]
+
+    def phone(self, i):
+        return f"+{self._value('phones', i)}"
+
+    def _index(self, i):
+        if not -self.size <= i < self.size:
+            raise IndexError("contact index out of range")
+        return i + self.size if i < 0 else i
+
+    def _value(self, column, i):
+        i = self._index(i)
+        if i >= self.offset:
+            return getattr(self, column)[i - self.offset]
+        return self._slice(column, i, i + 1)[0]
+
+    def _slice(self, column, start, stop):
+        # Rows start:stop of a stored column, from the spill files and memory
+        array = getattr(self, column)
+        if start >= self.offset:
+            return array[start - self.offset:stop - self.offset]
+        spilled = self._spill.read(column, array.dtype, start, min(stop, self.offset))
+        if stop <= self.offset:
+            return spilled
+        return np.concatenate([spilled, array[:stop - self.offset]])
+
+    @property
+    def in_memory(self):
+        """Rows currently held in memory (``offset`` to the end)."""
+        return self.size - self.offset
+
+    def spill_count(self, n):
+        """Rows that appending ``n`` rows will move out of memory first."""
+        if self.window is None or self.in_memory + n <= self.window:
+            return 0
+        # In blocks of a quarter window, so spills (and table updates) are rare
+        needed = self.in_memory + n - self.window
+        return min(self.in_memory, max(needed, self.window // 4))
+
+    def spill(self, n):
+        """Move the ``n`` oldest in-memory rows to the spill files."""
+        if self.read_only:
+            raise ValueError("snapshot is read-only")
+        if n <= 0:
+            return
+        if self._spill is None:
+            self._spill = _SpillFiles(self.spill_dir)
+        rest = self.in_memory - n
+        for column in STORED_COLUMNS:
+            array = getattr(self, column)
+            self._spill.append(column, array[:n])
+            array[:rest] = array[n:n + rest]
+        self.offset += n
+
+    def _reserve(self, n):
+        if self.read_only:
+            raise ValueError("snapshot is read-only")
+        self.spill(self.spill_count(n))
+        needed = self.in_memory + n
+        if needed <= len(self.phones):
+            return
+        capacity = max(needed, 2 * len(self.phones))
+        if self.window is not None:
+            capacity = max(needed, min(capacity, self.window))
+        for column in STORED_COLUMNS:
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.in_memory] = old[:self.in_memory]
+            setattr(self, column, new)
+
+    @staticmethod
+    def _code(value, codes, values):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, country, name, phone):
+        self._reserve(1)
+        i = self.in_memory
+        self.phones[i] = int(phone[1:])
+        self.countries[i] = self._code(country, self.country_codes, self.country_values)
+        self.names[i] = self._code(name, self.name_codes, self.name_values)
+        self.size += 1
+
+    def extend(self, records):
+        """Append ``(country, name, phone)`` records."""
+        records = list(records)
+        step = self.window or len(records)
+        for first in range(0, len(records), max(step, 1)):
+            self._extend(records[first:first + step])
+
+    def _extend(self, records):
+        self._reserve(len(records))
+        start, stop = self.in_memory, self.in_memory + len(records)
+        countries, names, phones = zip(*records)
+        self.phones[start:stop] = [int(phone[1:]) for phone in phones]
+        # Codes are looked up once per distinct value, in order of appearance
+        codes = {c: self._code(c, self.country_codes, self.country_values) for c in dict.fromkeys(countries)}
+        self.countries[start:stop] = list(map(codes.__getitem__, countries))
+        codes = {name: self._code(name, self.name_codes, self.name_values) for name in dict.fromkeys(names)}
+        self.names[start:stop] = list(map(codes.__getitem__, names))
+        self.size += len(records)
+
+    def extend_batch(self, country, names, phones):
+        """Append one country's NumPy batch (``names`` may be empty)."""
+        step = self.window or len(phones)
+        for first in range(0, len(phones), max(step, 1)):
+            self._extend_batch(country, names[first:first + step], phones[first:first + step])
+
+    def _extend_batch(self, country, names, phones):
+        n = len(phones)
+        self._reserve(n)
+        start, stop = self.in_memory, self.in_memory + n
+        self.phones[start:stop] = phone_keys(phones)
+        self.countries[start:stop] = self._code(country, self.country_codes, self.country_values)
+        if len(names):
+            # Only distinct names touch Python objects
+            values, inverse = np.unique(names, return_inverse=True)
+            codes = np.array([self._code(str(v), self.name_codes, self.name_values) for v in values], dtype=np.uint32)
+            self.names[start:stop] = codes[inverse]
+        else:
+            self.names[start:stop] = self._code("", self.name_codes, self.name_values)
+        self.size += n
+
+    def clear(self):
+        if self.read_only:
+            raise ValueError("snapshot is read-only")
+        self.size = 0
+        self.offset = 0
+        # Snapshots still reading the old spill files keep them alive
+        self._spill = None
+        self._line_types = np.zeros(0, dtype=np.uint8)
+
+    def snapshot(self):
+        """Read-only view of the rows so far; later appends don't change it."""
+        view = ContactStore.__new__(ContactStore)
+        view.__dict__.update(self.__dict__)
+        view.read_only = True
+        for column in STORED_COLUMNS:
+            array = getattr(self, column)[:self.in_memory]
+            # A window is shifted in place when it spills, so it is copied
+            setattr(view, column, array.copy() if self.window is not None else array)
+        view._line_types = self._line_types[:self.size]
+        view._line_type_values = list(self._line_type_values)
+        view._value_arrays = {}
+        return view
+
+    @property
+    def nbytes(self):
+        """Bytes of row data held in memory (spilled rows not included)."""
+        return self.phones.nbytes + self.countries.nbytes + self.names.nbytes
+
+    # Columns
+
+    def column(self, field, start=0, stop=None):
+        """Values of ``field`` for rows ``start:stop`` as a NumPy array."""
+        stop = self.size if stop is None else min(stop, self.size)
+        start = min(start, stop)
+        if field == "name":
+            return self._values_array(self.name_values)[self._slice("names", start, stop)]
+        if field == "phone":
+            return np.char.add("+", self._slice("phones", start, stop).astype("U20"))
+        if field == "country":
+            return self._values_array(self.country_values)[self._slice("countries", start, stop)]
+        if field == "line_type":
+            codes = self.line_type_codes(stop)[start:stop]
+            return self._values_array(self._line_type_values)[codes]
+        if field in ("national", "international", "rfc3966"):
+            return format_numbers(self.column("phone", start, stop), field)
+        if field == "email":
+            return np.array([_email(name, key) for name, key in
+                             zip(self.column("name", start, stop), self._slice("phones", start, stop).tolist())], dtype=object)
+        raise KeyError(f"unknown contact field: {field}")
+
+    def _values_array(self, values):
+        # Object array over an append-only value list, rebuilt only when it grew
+        cached = self._value_arrays.get(id(values))
+        if cached is None or len(cached) != len(values):
+            cached = self._value_arrays[id(values)] = np.array(values, dtype=object)
+        return cached
+
+    def line_type_codes(self, stop=None):
+        # Classified once per row and cached; only new rows are looked at
+        stop = self.size if stop is None else stop
+        done = len(self._line_types)
+        if done < stop:
+            if self._validator is None:
+                from phonegen.validate import Validator
+                self._validator = Validator()
+            codes = {value: i for i, value in enumerate(self._line_type_values)}
+            new = [self._code(self._validator.number_type(phone), codes, self._line_type_values)
+                   for phone in self.column("phone", done, stop)]
+            self._line_types = np.concatenate([self._line_types, np.array(new, dtype=np.uint8)])
+        return self._line_types
+
+    def iter_rows(self, fields=DEFAULT_FIELDS, chunk_size=ROWS_PER_CHUNK):
+        """Rows as tuples of ``fields``, built one column chunk at a time."""
+        for start in range(0, self.size, chunk_size):
+            yield from zip(*(self.values(field, start, start + chunk_size) for field in fields))
+
+    def values(self, field, start=0, stop=None):
+        """Like ``column`` but as a list of Python strings."""
+        if field == "phone":
+            stop = self.size if stop is None else min(stop, self.size)
+            return ["+%d" % key for key in self._slice("phones", min(start, stop), stop).tolist()]
+        return self.column(field, start, stop).tolist()
+
+    def to_pandas(self, fields=DEFAULT_FIELDS):
+        """DataFrame of ``fields``; name/country are categoricals over the codes."""
+        import pandas as pd
+        data = {}
+        for field in fields:
+            if field == "name":
+                data[field] = pd.Categorical.from_codes(self._slice("names", 0, self.size).astype(np.int64),
+                                                        self.name_values)
+            elif field == "country":
+                data[field] = pd.Categorical.from_codes(self._slice("countries", 0, self.size).astype(np.int64),
+                                                        self.country_values)
+            else:
+                data[field] = self.column(field)
+        return pd.DataFrame(data)
+
+    def to_arrow(self, fields=DEFAULT_FIELDS, start=0, stop=None):
+        """pyarrow Table of ``fields`` for rows ``start:stop``; name/country
+        are dictionary arrays."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        stop = self.size if stop is None else min(stop, self.size)
+        start = min(start, stop)
+        arrays = []
+        for field in fields:
+            if field == "phone":
+                keys = pc.cast(pa.array(self._slice("phones", start, stop)), pa.string())
+                arrays.append(pc.binary_join_element_wise("+", keys, ""))
+            elif field == "name":
+                arrays.append(pa.DictionaryArray.from_arrays(self._slice("names", start, stop), self.name_values))
+            elif field == "country":
+                arrays.append(pa.DictionaryArray.from_arrays(self._slice("countries", start, stop),
+                                                             self.country_values))
+            else:
+                arrays.append(pa.array(self.column(field, start, stop), type=pa.string()))
+        return pa.Table.from_arrays(arrays, names=list(fields))
+
+
+def _email(name, key):
+    # ASCII-folded name when there is one ("Nguyễn Anh" -> "nguyen.anh"),
+    # plus the last digits of the number so addresses rarely collide
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    local = ".".join("".join(c for c in part if c.isalnum()) for part in ascii_name.lower().split())
+    local = local.strip(".") or "contact"
+    return f"{local}.{key % 1000000:06d}@example.com"
+
+
+def generate_contacts(generator, country, language, mode, count, store=None, plan=None, start=0):
+    """Generate ``count`` contacts into a ContactStore with batch draws.
+
+    Same modes as ``iter_records``; in "Generate Phone All" mode the store
+    gets the same records ``start:start + count`` in the same order as
+    ``iter_records`` with ``plan`` (default: equal shares), batch by batch,
+    and names are empty.
+    """
+    store = store if store is not None else ContactStore()
+    if language == GENERATE_ALL:
+        plan = plan or make_plan(start + count, registry=generator.registry)
+        # The store keeps E.164 numbers whatever the generator writes
+        number_format, generator.number_format = generator.number_format, "e164"
+        try:
+            for countries, phones in iter_plan_batches(generator, plan, start, start + count):
+                records = [(country, "", phone) for country, phone in zip(countries, phones) if phone]
+                if records:
+                    store.extend(records)
+        finally:
+            generator.number_format = number_format
+        return store
+    phones = generator.generate_batch(country, count, as_bytes=True, number_format="e164")
+    if phones is None:
+        return store
+    name_language = generator.registry.language(country) if mode == "Auto" else language
+    if name_language in generator.names:
+        first, last = generator.get_names_batch(name_language, len(phones))
+        names = np.char.add(np.char.add(first, " "), last)
+    else:
+        names = np.full(len(phones), "Unknown Unknown")
+    store.extend_batch(country, names, phones)
+    return store
+
+
+def iter_contact_chunks(generator, country, language, mode, count, plan=None, chunk_size=GENERATE_CHUNK):
+    """Generate ``count`` contacts as ContactStores of ``chunk_size`` rows.
+
+    For runs too large to hold at once: each store is made when the
+    previous one has been consumed, e.g. by ``export_stores``.
+    """
+    if language == GENERATE_ALL and plan is None:
+        plan = make_plan(count, registry=generator.registry)
+    for start in range(0, count, chunk_size):
+        yield generate_contacts(generator, country, language, mode, min(chunk_size, count - start), plan=plan,
+                                start=start)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+# Run control shared between whoever drives a run (GUI, CLI signal handler)
+# and the code producing records. Producers call ``wait()`` at safe points,
+# i.e. after a record has been fully consumed, so stopping there leaves the
+# output and the generator state in step and a checkpoint taken afterwards
+# is an exact resume point. ``wait()`` blocks while the run is paused and
+# returns False once it is cancelled; while running it is one flag read.
+#
+# With ``shared=True`` the flags are multiprocessing events that can be
+# handed to worker processes (see phonegen.pool), which check them every
+# CHECK_EVERY records.
+
+CHECK_EVERY = 1000
+# How often a paused or waiting run looks at the flags again
+POLL_INTERVAL = 0.05
+
+
+class RunCancelled(Exception):
+    pass
+
+
+class RunControl:
+    def __init__(self, shared=False):
+        if shared:
+            import multiprocessing as events
+        else:
+            events = threading
+        self.shared = shared
+        self._cancel = events.Event()
+        self._resume = events.Event()
+        self._resume.set()
+        self.deadline = None
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set() and not self._cancel.is_set()
+
+    @property
+    def state(self):
+        return "cancelled" if self.cancelled else "paused" if self.paused else "running"
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def cancel(self, deadline=None):
+        """Ask the run to stop; returns at once.
+
+        The run flushes what it has written and saves its checkpoint.
+        Work still in flight in other processes is waited for at most
+        ``deadline`` seconds (default: not at all) and then dropped.
+        """
+        if deadline is not None:
+            self.deadline = time.monotonic() + deadline
+        self._cancel.set()
+        self._resume.set()  # wake a paused run so it can stop
+
+    def remaining(self):
+        # Seconds left before the cancel deadline, 0 without one
+        if self.deadline is None:
+            return 0.0
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def wait(self, on_pause=None, on_resume=None):
+        """Block while paused; False once the run is cancelled.
+
+        ``on_pause()`` is called once before blocking, e.g. to flush output
+        and checkpoint so a paused run can be closed and resumed later, and
+        ``on_resume()`` once it continues.
+        """
+        if not self._resume.is_set():
+            if on_pause is not None:
+                on_pause()
+            self._resume.wait()
+            if on_resume is not None:
+                on_resume()
+        return not self._cancel.is_set()
+
+    def check(self, records):
+        """Pass records through, calling ``wait()`` every CHECK_EVERY of them.
+
+        Raises RunCancelled when the run is cancelled.
+        """
+        for i, record in enumerate(records):
+            if not i % CHECK_EVERY and not self.wait():
+                raise RunCancelled
+            yield record
@@ -0,0 +1,168 @@
+import os
+import re
+
+import numpy as np
+
+# Phone numbers are stored as the integer value of their E.164 digits. The
+# high bits (key >> 32) select a bucket holding the low 32 bits as a sorted
+# uint32 array, i.e. 4 bytes per number. Single adds go to a small pending
+# set that is merged into the sorted arrays in bulk every MERGE_THRESHOLD
+# numbers, so inserts never shift the big arrays one at a time.
+
+MERGE_THRESHOLD = 1 << 16
+PHONE_PATTERN = re.compile(rb"\+(\d{4,15})")
+
+
+def phone_key(phone):
+    return int(phone.lstrip("+"))
+
+
+def phone_keys(numbers):
+    """Integer keys for a NumPy array of fixed-width E.164 strings."""
+    numbers = np.asarray(numbers)
+    if numbers.dtype.kind == "U":
+        numbers = numbers.astype(f"S{numbers.dtype.itemsize // 4}")
+    width = numbers.dtype.itemsize
+    digits = numbers.view(np.uint8).reshape(len(numbers), width)[:, 1:].astype(np.int64) - ord("0")
+    return digits @ (10 ** np.arange(width - 2, -1, -1, dtype=np.int64))
+
+
+class UniqueIndex:
+    """Memory-compact set of phone numbers for unique generation.
+
+    About 4 bytes per number, plus a bounded pending set. Can be preloaded
+    from existing output files so appends across runs stay unique.
+    """
+
+    def __init__(self, merge_threshold=MERGE_THRESHOLD):
+        self.merge_threshold = merge_threshold
+        self.buckets = {}
+        self.pending = set()
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values()) + len(self.pending)
+
+    def __contains__(self, phone):
+        return self.contains_key(phone_key(phone))
+
+    def contains_key(self, key):
+        if key in self.pending:
+            return True
+        bucket = self.buckets.get(key >> 32)
+        if bucket is None:
+            return False
+        # Search with a uint32 so NumPy doesn't cast the whole bucket
+        low = np.uint32(key & 0xFFFFFFFF)
+        i = bucket.searchsorted(low)
+        return i < len(bucket) and bucket[i] == low
+
+    def add(self, phone):
+        """Add a phone number; returns False if it was already present."""
+        return self.add_key(phone_key(phone))
+
+    def add_key(self, key):
+        if self.contains_key(key):
+            return False
+        self.pending.add(key)
+        if len(self.pending) >= self.merge_threshold:
+            self.merge_pending()
+        return True
+
+    def merge_pending(self):
+        if self.pending:
+            keys = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+            self.pending.clear()
+            self._merge(np.sort(keys))
+
+    def _merge(self, keys):
+        # keys: sorted, unique and not yet present
+        highs = keys >> 32
+        for high in np.unique(highs).tolist():
+            lows = (keys[highs == high] & 0xFFFFFFFF).astype(np.uint32)
+            bucket = self.buckets.get(high)
+            if bucket is None:
+                self.buckets[high] = lows
+                continue
+            # Linear merge of two sorted arrays
+            positions = bucket.searchsorted(lows) + np.arange(len(lows))
+            merged = np.empty(len(bucket) + len(lows), dtype=np.uint32)
+            inserted = np.zeros(len(merged), dtype=bool)
+            inserted[positions] = True
+            merged[positions] = lows
+            merged[~inserted] = bucket
+            self.buckets[high] = merged
+
+    def add_many(self, keys):
+        """Add integer keys in bulk.
+
+        Returns a boolean mask over ``keys`` marking the ones that were new
+        (only the first occurrence of a repeated key counts as new).
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        mask = np.zeros(len(keys), dtype=bool)
+        if not len(keys):
+            return mask
+        order = np.argsort(keys, kind="stable")
+        ordered = keys[order]
+        starts = np.concatenate(([True], ordered[1:] != ordered[:-1]))
+        unique, first = ordered[starts], order[starts]
+        present = np.zeros(len(unique), dtype=bool)
+        if self.pending:
+            pending = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+            present |= np.isin(unique, pending)
+        highs = unique >> 32
+        for high in np.unique(highs).tolist():
+            bucket = self.buckets.get(high)
+            if bucket is None or not len(bucket):
+                continue
+            selected = highs == high
+            lows = (unique[selected] & 0xFFFFFFFF).astype(np.uint32)
+            positions = np.minimum(bucket.searchsorted(lows), len(bucket) - 1)
+            present[selected] |= bucket[positions] == lows
+        self._merge(unique[~present])
+        mask[first[~present]] = True
+        return mask
+
+    def load_file(self, path, chunk_size=1 << 24, on_empty=None, stop=None):
+        """Add every phone number found in a txt/csv/jsonl output file.
+
+        Only E.164 numbers (+8559...) are recognized; ``on_empty(path)`` is
+        called when a non-empty file holds none. With ``stop`` only the
+        first ``stop`` bytes are read.
+        """
+        added = found = 0
+        with open(path, mode="rb") as f:
+            tail = b""
+            while True:
+                data = f.read(chunk_size if stop is None else min(chunk_size, stop - f.tell()))
+                if data:
+                    data = tail + data
+                    cut = data.rfind(b"\n") + 1
+                    data, tail = data[:cut], data[cut:]
+                else:
+                    data, tail = tail, b""
+                keys = np.array(PHONE_PATTERN.findall(data), dtype=np.int64)
+                found += len(keys)
+                added += int(self.add_many(keys).sum())
+                if not data and not tail:
+                    break
+        if not found and on_empty is not None and os.path.getsize(path):
+            on_empty(path)
+        return added
+
+    def load(self, paths, on_empty=None, stops=None):
+        # Files or directories (every *_phones.txt inside); ``stops`` maps
+        # absolute paths to the number of bytes to read from them
+        stops = stops or {}
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if name.endswith("_phones.txt"))
+            elif os.path.exists(path):
+                files.append(path)
+        return sum(self.load_file(path, on_empty=on_empty, stop=stops.get(os.path.abspath(path)))
+                   for path in files)
+
+    def nbytes(self):
+        return sum(bucket.nbytes for bucket in self.buckets.values())
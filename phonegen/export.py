@@ -0,0 +1,152 @@
+import csv
+import itertools
+import os
+
+# Rows are written in chunks straight from any iterable of tuples, so an
+# export never needs the whole dataset as a DataFrame. Parquet needs
+# pyarrow; xlsx uses xlsxwriter's constant-memory mode, falling back to
+# openpyxl's write-only workbook.
+
+EXPORT_FORMATS = ["txt", "csv", "parquet", "xlsx"]
+DEFAULT_CHUNK_SIZE = 10_000
+PARQUET_ROW_GROUP = 1 << 17
+
+
+def _chunks(rows, chunk_size):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in EXPORT_FORMATS else "txt"
+
+
+def _export_txt(chunks, path, columns):
+    with open(path, mode="w", encoding="utf-8") as f:
+        for chunk in chunks:
+            # Same "Name - Phone" layout as the GUI's TXT export always had
+            f.writelines(f"{row[-2]} - {row[-1]}\n" for row in chunk)
+
+
+def _export_csv(chunks, path, columns):
+    with open(path, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+
+
+def _export_parquet(chunks, path, columns, compression="zstd"):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from None
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for chunk in chunks:
+            arrays = [pa.array(values, type=pa.string()) for values in zip(*chunk)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _export_xlsx(chunks, path, columns):
+    try:
+        import xlsxwriter
+    except ImportError:
+        xlsxwriter = None
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, columns)
+        row_number = 1
+        for chunk in chunks:
+            for row in chunk:
+                sheet.write_row(row_number, 0, row)
+                row_number += 1
+        workbook.close()
+        return
+
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Excel export requires xlsxwriter or openpyxl") from None
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for chunk in chunks:
+        for row in chunk:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def export_rows(rows, path, columns=("Name", "Phone"), fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write ``rows`` (an iterable of tuples) to ``path`` chunk by chunk.
+
+    ``fmt`` is one of EXPORT_FORMATS and defaults to the file extension.
+    Returns the number of rows written.
+    """
+    fmt = fmt or export_format(path)
+    writers = {"txt": _export_txt, "csv": _export_csv, "parquet": _export_parquet, "xlsx": _export_xlsx}
+    if fmt not in writers:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    written = 0
+
+    def counted():
+        nonlocal written
+        for chunk in _chunks(rows, chunk_size):
+            written += len(chunk)
+            yield chunk
+
+    writers[fmt](counted(), path, list(columns))
+    return written
+
+
+def export_store(store, path, fields=("name", "phone"), fmt=None, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write ``fields`` of a ContactStore to ``path``.
+
+    Column titles default to the field names in title case ("Line Type").
+    Parquet goes straight from the store's arrays (names and countries as
+    dictionary columns), one row group at a time; other formats stream
+    ``store.iter_rows``. Either way rows a windowed store spilled to disk
+    are read back in chunks, so the export covers every row.
+    """
+    return export_stores([store], path, fields, fmt, columns, chunk_size)
+
+
+def export_stores(stores, path, fields=("name", "phone"), fmt=None, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the rows of several ContactStores, one after the other, to ``path``.
+
+    Same output as ``export_store``; ``stores`` may be a generator, and each
+    store is only read once the one before it is written.
+    """
+    fmt = fmt or export_format(path)
+    columns = list(columns or [field.replace("_", " ").title() for field in fields])
+    if fmt != "parquet":
+        rows = itertools.chain.from_iterable(store.iter_rows(fields, chunk_size) for store in stores)
+        return export_rows(rows, path, columns, fmt, chunk_size)
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from None
+    row_group_size = max(chunk_size, PARQUET_ROW_GROUP)
+    writer = None
+    written = 0
+    try:
+        for store in stores:
+            # An empty export still gets its columns from an empty table
+            starts = range(0, len(store), row_group_size) if len(store) or writer is not None else [0]
+            for start in starts:
+                table = store.to_arrow(fields, start, start + row_group_size).rename_columns(columns)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+                writer.write_table(table)
+            written += len(store)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
@@ -0,0 +1,307 @@
+import csv
+import itertools
+import json
+import random
+
+from phonegen.checkpoint import rng_state, set_rng_state
+from phonegen.names import NameCorpora
+from phonegen.registry import default_registry
+
+# Countries offered in the UI and drawn from in "Generate Phone All" mode;
+# any phonenumbers region can still be generated (see phonegen.registry)
+COUNTRIES = default_registry().countries
+LANGUAGES = ["Khmer", "Thai", "English", "Korean", "Vietnamese", "Japanese"]
+GENERATE_ALL = "Generate Phone All"
+FORMATS = ["txt", "csv", "jsonl"]
+# Fields a ContactStore (phonegen.contacts) can export; the first three are
+# stored, the rest derived
+FIELDS = ["name", "phone", "country", "line_type", "national", "international", "rfc3966", "email"]
+DEFAULT_FIELDS = ("name", "phone")
+
+# Draws per number before unique mode gives up on a (nearly) exhausted space
+MAX_UNIQUE_ATTEMPTS = 100
+# Walk positions computed at once for single draws in permuted mode
+WALK_BLOCK = 1024
+
+
+class Generate:
+    def __init__(self, rng=None, seed=None, unique=None, names_dir=None, registry=None, number_format="e164",
+                 shard=None, permute=False, key=None):
+        # Per-instance RNG so process/thread workers never share state; an
+        # integer seed makes the run reproducible and checkpointable. With a
+        # UniqueIndex as ``unique`` no number is ever returned twice. Names
+        # come from the weighted corpora in ``names_dir`` (or
+        # $PHONEGEN_NAMES_DIR) where present, else from ``name_data``.
+        # Prefixes, lengths and name languages come from ``registry``.
+        # Numbers are returned in ``number_format`` (see
+        # phonegen.numformat.NUMBER_FORMATS); uniqueness is always on E.164.
+        # With ``shard=(index, count)`` numbers only come from that slice of
+        # every country's space (phonegen.shard), so generators on other
+        # shards never produce the same number. With ``permute`` each
+        # country's numbers are walked in a keyed pseudo-random order
+        # (phonegen.permute) instead of drawn at random: no repeats until the
+        # space is used up, with one counter per country as the only state.
+        # ``key`` (default: plan_key()) picks the order.
+        self.seed = seed
+        self.unique = unique
+        self.number_format = number_format
+        self.shard = shard
+        self.shards = {}
+        self.permute = permute
+        self.walks = {}
+        self.permutations = {}
+        self.walk_blocks = {}
+        self.formatters = {}
+        self.rng = rng or random.Random(seed)
+        self.batch_rng = None
+        self._plan_key = key
+        self.registry = registry or default_registry()
+        self.validator = None
+        self.name_data = {
+            "Khmer": {
+                "first_names": ['សុភា', 'ចាន់ដា', 'រ័ត្ន', 'ស្រីពៅ'],
+                "last_names": ['ឈឿន', 'សោម', 'សុខ', 'ជាតិ']
+            },
+            "Thai": {
+                "first_names": ['สมชาย', 'สุดา', 'นิรันดร์', 'อนงค์'],
+                "last_names": ['ชัย', 'พันธ์', 'ลิ้ม', 'จันทร์']
+            },
+            "English": {
+                "first_names": ['John', 'Jane', 'Alex', 'Emily'],
+                "last_names": ['Smith', 'Johnson', 'Brown', 'Lee']
+            },
+            "Korean": {
+                "first_names": ['지수', '민호', '현', '수진'],
+                "last_names": ['김', '박', '이', '최']
+            },
+            "Vietnamese": {
+                "first_names": ['Anh', 'Hương', 'Nam', 'Linh'],
+                "last_names": ['Nguyễn', 'Trần', 'Lê', 'Phạm']
+            },
+            "Japanese": {
+                "first_names": ['Hiroshi', 'Yuki', 'Aiko', 'Ken'],
+                "last_names": ['Tanaka', 'Yamamoto', 'Sato', 'Suzuki']
+            }
+        }
+        self.names = NameCorpora(self.name_data, names_dir)
+
+    def number_space(self, country):
+        # None for codes that aren't phonenumbers regions
+        space = self.registry.number_space(country)
+        if self.shard is None or space is None:
+            return space
+        shard = self.shards.get(country)
+        if shard is None:
+            shard = self.shards[country] = space.shard(*self.shard)
+        return shard
+
+    def generate_and_validate_phone(self, country, rng=None):
+        # Numbers are drawn from the precomputed valid ranges, so no
+        # parse/is_valid_number round trip is needed and draws never fail.
+        rng = rng or self.rng
+        space = self.number_space(country)
+        if not space or not space.size:
+            return None
+        if self.unique is None:
+            phone = self.walk(country, space) if self.permute else space.sample(rng)
+            return self.format_phone(phone, space) if phone else None
+        for _ in self._attempts():
+            phone = self.walk(country, space) if self.permute else space.sample(rng)
+            if not phone:
+                return None
+            if self.unique.add(phone):
+                return self.format_phone(phone, space)
+        return None
+
+    def _attempts(self):
+        # A walk never repeats itself, so it only has excluded numbers to skip
+        # and runs until it is used up
+        return itertools.repeat(None) if self.permute else range(MAX_UNIQUE_ATTEMPTS)
+
+    def permutation(self, country, space):
+        permutation = self.permutations.get(country)
+        if permutation is None:
+            from phonegen.permute import KeyedPermutation
+            permutation = self.permutations[country] = KeyedPermutation(space.size, f"{self.plan_key()}-{country}")
+        return permutation
+
+    def walk(self, country, space):
+        # Next number of the country's permuted walk, None once it is used up
+        position = self.walks.get(country, 0)
+        if position >= space.size:
+            return None
+        start, block = self.walk_blocks.get(country, (0, ()))
+        if not start <= position < start + len(block):
+            start, block = position, self.permutation(country, space).take(
+                position, min(WALK_BLOCK, space.size - position)).tolist()
+            self.walk_blocks[country] = start, block
+        self.walks[country] = position + 1
+        return space.number_at(block[position - start])
+
+    def walk_batch(self, country, space, n):
+        # Next ``n`` numbers of the walk as E.164 bytes, fewer at its end
+        position = self.walks.get(country, 0)
+        n = max(min(n, space.size - position), 0)
+        self.walks[country] = position + n
+        return space.numbers_at(self.permutation(country, space).take(position, n), as_bytes=True)
+
+    def format_phone(self, phone, space):
+        # E.164 number from ``space`` in this generator's number format
+        if self.number_format == "e164":
+            return phone
+        formatter = self.formatters.get(space.country_code)
+        if formatter is None:
+            from phonegen.numformat import country_format
+            formatter = self.formatters[space.country_code] = country_format(space.country_code, self.number_format)
+        return formatter.format(phone[len(space.prefix):])
+
+    def validate_phone(self, phone, country=None):
+        # Compiled per-country checks, built on first use and shared by every
+        # call; same answer as phonenumbers.parse + is_valid_number
+        if self.validator is None:
+            from phonegen.validate import Validator
+            self.validator = Validator()
+        return self.validator.is_valid(phone, country)
+
+    def generate_batch(self, country, n, as_bytes=False, number_format=None, rng=None):
+        # Whole batch is drawn and formatted as NumPy arrays in one shot, in
+        # ``number_format`` (default: the generator's), from ``rng``
+        # (default: the generator's batch RNG)
+        space = self.number_space(country)
+        if not space or not space.size:
+            return None
+        if rng is None:
+            if self.batch_rng is None:
+                import numpy as np
+                self.batch_rng = np.random.default_rng(self.seed)
+            rng = self.batch_rng
+        number_format = number_format or self.number_format
+        if self.unique is None:
+            numbers = self.walk_batch(country, space, n) if self.permute else space.sample_batch(n, rng, as_bytes=True)
+        else:
+            import numpy as np
+            from phonegen.dedup import phone_keys
+            parts, missing = [], n
+            for _ in self._attempts():
+                if not missing:
+                    break
+                if self.permute:
+                    numbers = self.walk_batch(country, space, missing)
+                    if not len(numbers):
+                        break
+                else:
+                    numbers = space.sample_batch(missing, rng, as_bytes=True)
+                numbers = numbers[self.unique.add_many(phone_keys(numbers))]
+                parts.append(numbers)
+                missing -= len(numbers)
+            numbers = np.concatenate(parts) if parts else np.empty(0, dtype="S1")
+        if number_format != "e164":
+            from phonegen.numformat import format_numbers
+            return format_numbers(numbers, number_format, as_bytes)
+        return numbers if as_bytes else numbers.astype(f"U{numbers.dtype.itemsize}")
+
+    def plan_key(self):
+        # Seeds the batches of planned runs (phonegen.plan) and keys the
+        # permuted walks: the run's seed, else a random key that is saved
+        # with the checkpoint
+        if self._plan_key is None:
+            self._plan_key = self.seed if self.seed is not None else random.SystemRandom().getrandbits(64)
+        return self._plan_key
+
+    def checkpoint(self):
+        state = {"seed": self.seed, "rng": rng_state(self.rng)}
+        if self.batch_rng is not None:
+            state["batch_rng"] = self.batch_rng.bit_generator.state
+        if self._plan_key is not None:
+            state["plan_key"] = self._plan_key
+        if self.walks:
+            state["walks"] = dict(self.walks)
+        return state
+
+    def restore(self, state):
+        set_rng_state(self.rng, state["rng"])
+        self._plan_key = state.get("plan_key", self._plan_key)
+        self.walks = dict(state.get("walks", {}))
+        if "batch_rng" in state:
+            import numpy as np
+            self.batch_rng = np.random.default_rng()
+            self.batch_rng.bit_generator.state = state["batch_rng"]
+
+    def get_name(self, language, country):
+        if language not in self.names:
+            return "Unknown", "Unknown"
+        return self.names.draw(language, self.rng)
+
+    def get_names_batch(self, language, n):
+        # (first_names, last_names) NumPy arrays drawn from the batch RNG
+        if self.batch_rng is None:
+            import numpy as np
+            self.batch_rng = np.random.default_rng(self.seed)
+        return self.names.draw_batch(language, n, self.batch_rng)
+
+    def get_name_by_country(self, country):
+        return self.get_name(self.registry.language(country), country)
+
+
+def format_line(name, phone):
+    # Same line format as phones_output/{country}_phones.txt
+    return f"{name} - {phone}" if name else phone
+
+
+def iter_records(generator, country, language, mode, count, plan=None, start=0):
+    """Yield ``(country, full_name, phone)`` records one at a time.
+
+    "Generate Phone All" mode yields records ``start:start + count`` of
+    ``plan`` (default: equal shares of the registry's countries, see
+    phonegen.plan) with empty names. ``phone`` is None when the country is
+    not supported.
+    """
+    if language == GENERATE_ALL:
+        from phonegen.plan import iter_plan_records, make_plan
+        plan = plan or make_plan(start + count, registry=generator.registry)
+        yield from iter_plan_records(generator, plan, start, start + count)
+        return
+
+    for _ in range(count):
+        phone = generator.generate_and_validate_phone(country)
+        if not phone:
+            yield country, "", None
+            continue
+        if mode == "Auto":
+            first, last = generator.get_name_by_country(country)
+        else:
+            first, last = generator.get_name(language, country)
+        yield country, f"{first} {last}", phone
+
+
+def iter_lines(records, fmt, header=True):
+    """Turn ``(country, name, phone)`` records into output lines lazily."""
+    if fmt == "csv":
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header:
+            writer.writerow(["country", "name", "phone"])
+            yield buffer.pop()
+        for record in records:
+            writer.writerow(record)
+            yield buffer.pop()
+    elif fmt == "jsonl":
+        for country, name, phone in records:
+            yield json.dumps({"country": country, "name": name, "phone": phone}, ensure_ascii=False) + "\n"
+    else:
+        for _, name, phone in records:
+            yield format_line(name, phone) + "\n"
+
+
+class _LineBuffer:
+    # Minimal file-like sink so csv.writer can format one row at a time
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def pop(self):
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
@@ -0,0 +1,127 @@
+import os
+from functools import lru_cache
+
+# Name corpora are plain UTF-8 text files, one name per line with an optional
+# tab-separated frequency weight (default 1); blank lines and lines starting
+# with "#" are skipped. A corpus directory holds one file per language and
+# part, e.g. "khmer_first_names.txt" and "khmer_last_names.txt". Parts
+# without a file fall back to the built-in lists in Generate.name_data; a
+# language with neither for some part is not available.
+
+NAMES_DIR_ENV = "PHONEGEN_NAMES_DIR"
+NAME_PARTS = ["first_names", "last_names"]
+
+
+class NameCorpus:
+    """Weighted list of names sampled in O(1) per draw (Vose alias method)."""
+
+    def __init__(self, names, weights=None):
+        if not names:
+            raise ValueError("name corpus is empty")
+        if weights is None:
+            weights = [1.0] * len(names)
+        if len(weights) != len(names):
+            raise ValueError("names and weights differ in length")
+        total = float(sum(weights))
+        if total <= 0 or min(weights) < 0:
+            raise ValueError("name weights must be non-negative and not all zero")
+        self.names = list(names)
+        self.prob, self.alias = _alias_table([w * len(weights) / total for w in weights])
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def draw(self, rng):
+        # One uniform picks both the column and the coin: the integer part is
+        # the column, the fraction decides between it and its alias.
+        x = rng.random() * len(self.names)
+        i = int(x)
+        if x - i >= self.prob[i]:
+            i = self.alias[i]
+        return self.names[i]
+
+    def draw_batch(self, n, rng):
+        """Draw ``n`` names with a NumPy Generator, as a NumPy string array."""
+        import numpy as np
+        if self._arrays is None:
+            self._arrays = (np.array(self.names), np.array(self.prob), np.array(self.alias, dtype=np.int64))
+        names, prob, alias = self._arrays
+        x = rng.random(n) * len(names)
+        i = x.astype(np.int64)
+        i = np.where(x - i < prob[i], i, alias[i])
+        return names[i]
+
+
+def _alias_table(scaled):
+    n = len(scaled)
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # Leftovers are 1.0 up to rounding error
+    return prob, alias
+
+
+def corpus_path(directory, language, part):
+    return os.path.join(directory, f"{language.lower()}_{part}.txt")
+
+
+@lru_cache(maxsize=None)
+def load_corpus(path):
+    """Read a corpus file once per process; later calls share the table."""
+    names, weights = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, _, weight = line.partition("\t")
+            names.append(name.strip())
+            weights.append(float(weight) if weight.strip() else 1.0)
+    return NameCorpus(names, weights)
+
+
+class NameCorpora:
+    """Per-language corpora, loaded the first time a language is drawn from."""
+
+    def __init__(self, builtin, directory=None):
+        self.builtin = builtin
+        self.directory = directory if directory is not None else os.environ.get(NAMES_DIR_ENV)
+        self.corpora = {}
+
+    def __contains__(self, language):
+        # Every part needs a file or a built-in list to draw from
+        return all(self._path(language, part) or part in self.builtin.get(language, {}) for part in NAME_PARTS)
+
+    def _path(self, language, part):
+        path = corpus_path(self.directory, language, part) if self.directory else None
+        return path if path and os.path.exists(path) else None
+
+    def corpus(self, language, part):
+        key = (language, part)
+        corpus = self.corpora.get(key)
+        if corpus is None:
+            path = self._path(language, part)
+            if path:
+                corpus = load_corpus(path)
+            elif part in self.builtin.get(language, {}):
+                corpus = NameCorpus(self.builtin[language][part])
+            else:
+                raise ValueError(f"no {part.replace('_', ' ')} for {language}: "
+                                 f"{corpus_path(self.directory or '.', language, part)} is missing")
+            self.corpora[key] = corpus
+        return corpus
+
+    def draw(self, language, rng):
+        return tuple(self.corpus(language, part).draw(rng) for part in NAME_PARTS)
+
+    def draw_batch(self, language, n, rng):
+        return tuple(self.corpus(language, part).draw_batch(n, rng) for part in NAME_PARTS)
@@ -0,0 +1,417 @@
+import re
+from functools import lru_cache
+from operator import itemgetter
+
+from phonegen.ranges import ALL_DIGITS, _extend, parse_pattern
+
+# Numbers are generated and stored as E.164 ("+85596..."). The national,
+# international and RFC3966 forms are produced here without parsing each
+# number: the formatting rules of a calling code are compiled once from
+# phonenumbers' metadata. The leading digits of a number pick its format
+# (usually the first few are enough), and every (national number length,
+# format) pair gets a fixed *layout*, i.e. which literal text and which slices
+# of the national number make up the output.
+#
+# A layout is worked out by running phonenumbers' own algorithm (pick the
+# first format whose leading digits and pattern match, re.sub its rule, fix
+# up separators for RFC3966) once on the real number and once on a string of
+# distinct Unicode digits of the same length. Format patterns only use \d,
+# which matches those digits too, so the second run shows where every output
+# character comes from. The result is the same string format_number would
+# return; numbers whose national number parse() would shorten (a national
+# prefix after the country code) are left to phonenumbers.
+
+NUMBER_FORMATS = ["e164", "national", "international", "rfc3966"]
+
+# 20 distinct characters matched by \d (Arabic-Indic and Devanagari digits);
+# national numbers are at most 17 digits
+MARKERS = "".join(chr(base + i) for base in (0x0660, 0x0966) for i in range(10))
+MARKER_INDEX = {marker: i for i, marker in enumerate(MARKERS)}
+
+# Same as phonenumbers' _FIRST_GROUP_PATTERN: the first group reference
+FIRST_GROUP = re.compile(r"(\\\d)")
+# Patterns built from \d, groups and quantifiers only behave the same for
+# any digits of a given length
+DIGIT_AGNOSTIC = re.compile(r"(?:\\d|\(\?:|[()|?]|\{\d+(?:,\d*)?\})*")
+
+
+def _leading_length(pattern):
+    # How many digits a leading digits pattern can look at, None if unbounded
+    if pattern is None:
+        return 0
+    try:
+        return _max_length(parse_pattern(pattern))
+    except ValueError:
+        return None
+
+
+def _max_length(branches):
+    longest = 0
+    for seq in branches:
+        total = 0
+        for atom, low, high in seq:
+            size = 1 if isinstance(atom, str) else _max_length(atom)
+            if high is None or size is None:
+                return None
+            total += size * high
+        longest = max(longest, total)
+    return longest
+
+
+class CountryFormat:
+    """Compiled formatting of one calling code into one number format."""
+
+    def __init__(self, country_code, number_format):
+        import phonenumbers
+        from phonenumbers import PhoneMetadata
+        from phonenumbers.phonenumberutil import _SEPARATOR_PATTERN
+
+        self.country_code = country_code
+        self.number_format = number_format
+        self.separators = _SEPARATOR_PATTERN
+        region = phonenumbers.region_code_for_country_code(country_code)
+        metadata = PhoneMetadata.metadata_for_region_or_calling_code(country_code, region.upper())
+        if metadata is None:
+            raise ValueError(f"Unknown country calling code: {country_code}")
+        self.prefix = {"national": "", "international": f"+{country_code} ",
+                       "rfc3966": f"tel:+{country_code}-"}[number_format]
+        formats = metadata.number_format
+        if number_format != "national" and metadata.intl_number_format:
+            formats = metadata.intl_number_format
+        # (leading digits regex or None, how many digits it can look at or
+        # None if unbounded, pattern, rule)
+        self.formats = []
+        for fmt in formats:
+            leading = fmt.leading_digits_pattern[-1] if fmt.leading_digits_pattern else None
+            rule = fmt.format
+            if number_format == "national" and fmt.national_prefix_formatting_rule:
+                rule = FIRST_GROUP.sub(fmt.national_prefix_formatting_rule, rule, count=1)
+            self.formats.append((re.compile(leading) if leading else None, _leading_length(leading),
+                                 re.compile(fmt.pattern), rule))
+        # Layouts are shared by numbers of the same length only when every
+        # pattern is digit-agnostic (true for all of the current metadata);
+        # otherwise each number is formatted by itself
+        self.agnostic = all(DIGIT_AGNOSTIC.fullmatch(fmt.pattern) for fmt in formats)
+        prefix = metadata.national_prefix_for_parsing or metadata.national_prefix
+        self.national_prefix = re.compile(prefix) if prefix else None
+        self.candidates = {}  # length -> indexes of the formats that fit it
+        self.routes = {}      # length -> (selector regex, layout functions) or None
+        self.decisions = {}   # (length, leading digits) -> format index, -1 or None
+        self.layouts = {}     # (length, format index) -> layout
+
+    def _choose(self, nsn):
+        # phonenumbers' _choose_formatting_pattern_for_number, as an index
+        for i, (leading, size, pattern, rule) in enumerate(self.formats):
+            if (leading is None or leading.match(nsn)) and pattern.fullmatch(nsn):
+                return i
+        return -1
+
+    def decide(self, digits, length):
+        """Index of the format chosen for every national number of
+        ``length`` that starts with ``digits`` (-1: none fits), or None when
+        that depends on later digits."""
+        key = (length, digits)
+        if key in self.decisions:
+            return self.decisions[key]
+        decision = -1
+        for i in self._candidates(length):
+            leading, size = self.formats[i][:2]
+            # Leading digit patterns have no anchors, so a match within
+            # ``digits`` holds for any number starting with them, and a
+            # pattern that can look at no more digits cannot match later
+            if leading is None or leading.match(digits):
+                decision = i
+                break
+            if len(digits) < length and (size is None or size > len(digits)):
+                decision = None
+                break
+        self.decisions[key] = decision
+        return decision
+
+    def _candidates(self, length):
+        candidates = self.candidates.get(length)
+        if candidates is None:
+            sample = "0" * length
+            candidates = self.candidates[length] = [
+                i for i, (leading, size, pattern, rule) in enumerate(self.formats) if pattern.fullmatch(sample)]
+        return candidates
+
+    def _route(self, length):
+        # For one number at a time: one regex makes the whole choice (the
+        # alternatives are tried in order, so the named group that matched
+        # is the first fitting format) and picks a ready layout function
+        if not self.agnostic or not 2 <= length <= 17:
+            return None
+        candidates = self._candidates(length)
+        branches = [f"(?P<f{i}>{self.formats[i][0].pattern if self.formats[i][0] else ''})" for i in candidates]
+        functions = {f"f{i}": _layout_function(self.layout(length, i)) for i in candidates}
+        functions[None] = _layout_function(self.layout(length, -1))
+        return re.compile("|".join(branches) or "(?!)"), functions
+
+    def _format_nsn(self, index, nsn):
+        # phonenumbers' _format_nsn_using_pattern, or the bare number
+        if index < 0:
+            return nsn
+        leading, size, pattern, rule = self.formats[index]
+        formatted = pattern.sub(rule, nsn)
+        if self.number_format == "rfc3966":
+            if self.separators.match(formatted):
+                formatted = self.separators.sub("", formatted, count=1)
+            formatted = self.separators.sub("-", formatted)
+        return formatted
+
+    def parse_changes(self, nsn):
+        # Whether parse() could strip or transform a national prefix at the
+        # start of nsn; an empty match (patterns like "0?(...)?") never does
+        if self.national_prefix is None:
+            return False
+        match = self.national_prefix.match(nsn)
+        return match is not None and match.end() > 0
+
+    def exact(self, nsn):
+        """The string format_number gives for ``+{country_code}{nsn}``."""
+        if self.parse_changes(nsn) or not 2 <= len(nsn) <= 17:
+            return _slow_format(f"+{self.country_code}{nsn}", self.number_format)
+        return self.prefix + self._format_nsn(self._choose(nsn), nsn)
+
+    def layout(self, length, index):
+        """Pieces of the output for national numbers of ``length`` written
+        with format ``index``: literal strings and ``(start, stop)`` slices
+        of the national number."""
+        layout = self.layouts.get((length, index))
+        if layout is None:
+            layout = self.layouts[length, index] = self._compile_layout(length, index)
+        return layout
+
+    def _compile_layout(self, length, index):
+        formatted = self.prefix + self._format_nsn(index, MARKERS[:length])
+        pieces = []
+        for char in formatted:
+            i = MARKER_INDEX.get(char)
+            if i is None:
+                if pieces and isinstance(pieces[-1], str):
+                    pieces[-1] += char
+                else:
+                    pieces.append(char)
+            elif pieces and not isinstance(pieces[-1], str) and pieces[-1][1] == i:
+                pieces[-1] = (pieces[-1][0], i + 1)
+            else:
+                pieces.append((i, i + 1))
+        return tuple(pieces)
+
+    def format(self, nsn):
+        length = len(nsn)
+        route = self.routes.get(length, False)
+        if route is False:
+            route = self.routes[length] = self._route(length)
+        if route is None or self.national_prefix is not None and self.parse_changes(nsn):
+            return self.exact(nsn)
+        selector, functions = route
+        match = selector.match(nsn)
+        return functions[match.lastgroup if match else None](nsn)
+
+
+@lru_cache(maxsize=None)
+def _layout_function(layout):
+    # One %-template and all the slices in one itemgetter call, e.g.
+    #   "+855 %s %s %s" % itemgetter(slice(0, 2), slice(2, 5), slice(5, 9))(n)
+    slices = [slice(*piece) for piece in layout if not isinstance(piece, str)]
+    if not slices:
+        text = "".join(layout)
+        return lambda n: text
+    template = "".join(piece.replace("%", "%%") if isinstance(piece, str) else "%s" for piece in layout)
+    # A single slice comes back as a plain string, which % also takes
+    pieces = itemgetter(*slices)
+    return lambda n: template % pieces(n)
+
+
+@lru_cache(maxsize=None)
+def country_format(country_code, number_format):
+    return CountryFormat(country_code, number_format)
+
+
+def _slow_format(phone, number_format):
+    import phonenumbers
+    formats = {"e164": phonenumbers.PhoneNumberFormat.E164, "national": phonenumbers.PhoneNumberFormat.NATIONAL,
+               "international": phonenumbers.PhoneNumberFormat.INTERNATIONAL,
+               "rfc3966": phonenumbers.PhoneNumberFormat.RFC3966}
+    return phonenumbers.format_number(phonenumbers.parse(phone, None), formats[number_format])
+
+
+def format_number(phone, number_format, country_code=None):
+    """Format one E.164 string; same result as phonenumbers.format_number.
+
+    Pass ``country_code`` when it is known to skip finding it.
+    """
+    if number_format == "e164":
+        return phone
+    if country_code is None:
+        from phonegen.validate import split_e164
+        split = split_e164(phone)
+        if split is None:
+            return _slow_format(phone, number_format)
+        country_code = split[0]
+    return country_format(country_code, number_format).format(phone[len(str(country_code)) + 1:])
+
+
+def format_numbers(numbers, number_format, as_bytes=False):
+    """Vectorized ``format_number`` for an array of E.164 strings.
+
+    Returns a NumPy string array (``S`` dtype with ``as_bytes``, else
+    ``U``). Rows sharing a calling code, length and leading digits are
+    built together from their layout with array operations.
+    """
+    import numpy as np
+    from phonenumbers import COUNTRY_CODE_TO_REGION_CODE
+
+    numbers = np.asarray(numbers)
+    if numbers.dtype.kind == "U":
+        numbers = numbers.astype(f"S{numbers.dtype.itemsize // 4}")
+    if number_format == "e164" or not len(numbers):
+        return numbers if as_bytes else numbers.astype(f"U{max(numbers.dtype.itemsize, 1)}")
+    width = numbers.dtype.itemsize
+    matrix = numbers.view(np.uint8).reshape(len(numbers), width)
+    lengths = np.count_nonzero(matrix, axis=1)
+
+    # Calling code of every row: the first of its 1-3 leading digits that is one
+    known = np.zeros(1000, dtype=bool)
+    known[list(COUNTRY_CODE_TO_REGION_CODE)] = True
+    digits = np.zeros((len(numbers), 3), dtype=np.int64)
+    digits[:, :min(3, width - 1)] = matrix[:, 1:4].astype(np.int64) - ord("0")
+    one, two = digits[:, 0], digits[:, 0] * 10 + digits[:, 1]
+    three = two * 10 + digits[:, 2]
+    codes = np.where(known[one.clip(0, 999)], one, np.where(known[two.clip(0, 999)], two, three.clip(0, 999)))
+    code_sizes = np.where(codes < 10, 1, np.where(codes < 100, 2, 3))
+
+    blocks, singles = [], {}
+    group_keys = codes * 100 + lengths
+    for group in np.unique(group_keys).tolist():
+        rows = np.flatnonzero(group_keys == group)
+        country_code, length = divmod(group, 100)
+        start = 1 + int(code_sizes[rows[0]])
+        national = matrix[rows, start:length]
+        if not known[country_code]:
+            singles.update((row, _slow_format(numbers[row].decode("ascii"), number_format)) for row in rows.tolist())
+            continue
+        formatter = country_format(country_code, number_format)
+        size = national.shape[1]
+        if formatter.agnostic and 2 <= size <= 17:
+            slow = _parse_changes(formatter, national)
+        else:
+            slow = np.ones(len(rows), dtype=bool)
+        for i in np.flatnonzero(slow).tolist():
+            singles[int(rows[i])] = formatter.exact(national[i].tobytes().decode("ascii"))
+        fast = np.flatnonzero(~slow)
+
+        # Settle the format of each row on as few leading digits as possible:
+        # one more digit per round, for the rows still open, looking only at
+        # their distinct prefixes
+        chosen = np.full(len(fast), -1)
+        pending = np.arange(len(fast))
+        keys = np.zeros(len(fast), dtype=np.int64)
+
+        def decide(digits):
+            index = formatter.decide(digits, size)
+            return -2 if index is None else index
+
+        for j in range(size + 1):
+            if j:
+                keys = keys * 10 + (national[fast[pending], j - 1] - ord("0"))
+            decided = _by_prefix(keys, j, decide)
+            done = decided != -2
+            chosen[pending[done]] = decided[done]
+            pending, keys = pending[~done], keys[~done]
+            if not len(pending):
+                break
+        # A handful of layouts per length, each built for all its rows at once
+        for index in np.unique(chosen).tolist():
+            members = fast[chosen == index]
+            blocks.append((rows[members], _build(national[members], formatter.layout(size, index))))
+
+    # Put the blocks and the one-off strings together into one array
+    out_width = max([block.shape[1] for _, block in blocks] +
+                    [len(text.encode("utf-8")) for text in singles.values()] + [1])
+    result = np.zeros((len(numbers), out_width), dtype=np.uint8)
+    for rows, block in blocks:
+        result[rows, :block.shape[1]] = block
+    for row, text in singles.items():
+        data = text.encode("utf-8")
+        result[row, :len(data)] = np.frombuffer(data, dtype=np.uint8)
+    formatted = result.view(f"S{out_width}").ravel()
+    if as_bytes:
+        return formatted
+    if all(text.isascii() for text in singles.values()):
+        return formatted.astype(f"U{out_width}")
+    return np.char.decode(formatted, "utf-8")
+
+
+def _parse_changes(formatter, national):
+    # CountryFormat.parse_changes for a uint8 matrix of national numbers
+    import numpy as np
+    prefix = formatter.national_prefix.pattern if formatter.national_prefix is not None else ""
+    if not prefix:
+        return np.zeros(len(national), dtype=bool)
+    if prefix.isdigit():
+        # Most national prefixes are plain digits ("0", "8", ...)
+        if len(prefix) > national.shape[1]:
+            return np.zeros(len(national), dtype=bool)
+        expected = np.frombuffer(prefix.encode("ascii"), dtype=np.uint8)
+        return (national[:, :len(prefix)] == expected).all(axis=1)
+    size = _leading_length(prefix)
+    if size is None or size > 17:
+        nsns = national.view(f"S{national.shape[1]}").ravel().tolist()
+        return np.array([formatter.parse_changes(nsn.decode("ascii")) for nsn in nsns], dtype=bool)
+    # Only rows starting with a digit a non-empty match can start with need
+    # a look, and the pattern sees no more than their first ``size`` digits:
+    # check each distinct prefix of that length once
+    changes = np.zeros(len(national), dtype=bool)
+    rows = np.flatnonzero(np.isin(national[:, 0], _first_digits(prefix, size)))
+    size = min(size, national.shape[1])
+    leading = national[rows, :size].astype(np.int64) - ord("0")
+    keys = leading @ (10 ** np.arange(size - 1, -1, -1, dtype=np.int64))
+    changes[rows] = _by_prefix(keys, size, formatter.parse_changes).astype(bool)
+    return changes
+
+
+def _by_prefix(keys, length, decide):
+    # ``decide(digits)`` (an int) for every row, given each row's first
+    # ``length`` digits as an int; called once per distinct prefix
+    import numpy as np
+    if length <= 6:
+        # Dense lookup table instead of sorting
+        seen = np.zeros(10 ** length, dtype=bool)
+        seen[keys] = True
+        unique_keys = np.flatnonzero(seen)
+        table = np.zeros(10 ** length, dtype=np.int64)
+        table[unique_keys] = [decide(str(key).zfill(length) if length else "") for key in unique_keys.tolist()]
+        return table[keys]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    decided = [decide(str(key).zfill(length)) for key in unique_keys.tolist()]
+    return np.array(decided, dtype=np.int64)[inverse.ravel()]
+
+
+@lru_cache(maxsize=None)
+def _first_digits(pattern, size):
+    # ASCII codes of the digits a non-empty match of ``pattern`` starts with
+    import numpy as np
+    templates = _extend(parse_pattern(pattern), {()}, (ALL_DIGITS,) * size)
+    digits = set().union(*[template[0] for template in templates if template])
+    return np.frombuffer("".join(sorted(digits)).encode("ascii"), dtype=np.uint8)
+
+
+def _build(national, layout):
+    # uint8 rows of the formatted numbers for national numbers sharing a layout
+    import numpy as np
+    width = sum(len(piece) if isinstance(piece, str) else piece[1] - piece[0] for piece in layout)
+    out = np.empty((len(national), width), dtype=np.uint8)
+    column = 0
+    for piece in layout:
+        if isinstance(piece, str):
+            data = piece.encode("ascii")
+            out[:, column:column + len(data)] = np.frombuffer(data, dtype=np.uint8)
+            column += len(data)
+        else:
+            start, stop = piece
+            out[:, column:column + stop - start] = national[:, start:stop]
+            column += stop - start
+    return out
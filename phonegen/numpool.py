@@ -0,0 +1,136 @@
+import argparse
+import os
+import random
+import struct
+import sys
+
+import numpy as np
+
+from phonegen.dedup import UniqueIndex, phone_keys
+from phonegen.generate import Generate
+from phonegen.registry import default_registry
+
+# A number pool is a file of pre-generated valid numbers for one country:
+# a 64-byte header followed by one little-endian uint64 per number (the
+# integer value of its E.164 digits, as in phonegen.dedup). Readers
+# memory-map the array, so draws cost an index and every process reading the
+# same pool shares one copy in the page cache.
+#
+#   python -m phonegen.numpool build -c KH -n 10000000 -o kh.pool [--seed 1] [--unique]
+#   python -m phonegen.numpool draw kh.pool -n 10 [--sequential --start 0]
+
+MAGIC = b"PGPOOL\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8sI4sQ")
+HEADER_SIZE = 64
+DTYPE = np.dtype("<u8")
+BUILD_CHUNK = 1 << 20
+
+
+def build_pool(path, country, count, seed=None, unique=False, chunk_size=BUILD_CHUNK):
+    """Generate ``count`` numbers for ``country`` into a pool file at ``path``.
+
+    The file is written under a temporary name and renamed when complete,
+    so readers never see a partial pool. Returns the number of entries.
+    """
+    generator = Generate(seed=seed, unique=UniqueIndex() if unique else None)
+    space = generator.number_space(country)
+    if not space or not space.size:
+        raise ValueError(f"No valid numbers for {country}")
+    tmp = f"{path}.tmp"
+    written = 0
+    with open(tmp, mode="wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, country.encode("ascii"), 0).ljust(HEADER_SIZE, b"\0"))
+        while written < count:
+            numbers = generator.generate_batch(country, min(chunk_size, count - written), as_bytes=True)
+            if not len(numbers):
+                break  # unique mode exhausted the number space
+            f.write(phone_keys(numbers).astype(DTYPE).tobytes())
+            written += len(numbers)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, country.encode("ascii"), written))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return written
+
+
+class NumberPool:
+    """Read-only, memory-mapped view of a pool file."""
+
+    def __init__(self, path):
+        with open(path, mode="rb") as f:
+            magic, version, country, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} number pool")
+        self.path = path
+        self.country = country.rstrip(b"\0").decode("ascii")
+        self.keys = np.memmap(path, dtype=DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)) if count else \
+            np.empty(0, dtype=DTYPE)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, i):
+        return f"+{self.keys[i]}"
+
+    def draw(self, rng=random):
+        return f"+{self.keys[rng.randrange(len(self.keys))]}"
+
+    def draw_batch(self, n, rng=None, as_bytes=False):
+        """``n`` random numbers as a NumPy string array."""
+        if rng is None:
+            rng = np.random.default_rng()
+        return self.format(self.keys[rng.integers(0, len(self.keys), size=n)], as_bytes)
+
+    def take(self, start, n, as_bytes=False):
+        """Numbers ``start`` .. ``start + n - 1`` in pool order, wrapping around."""
+        indices = (start + np.arange(n, dtype=np.int64)) % len(self.keys)
+        return self.format(self.keys[indices], as_bytes)
+
+    @staticmethod
+    def format(keys, as_bytes=False):
+        numbers = np.char.add(b"+", np.asarray(keys).astype("S20"))
+        return numbers if as_bytes else numbers.astype(f"U{numbers.dtype.itemsize}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="phonegen.numpool", description="Build and read memory-mapped number pools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Pre-generate a pool file")
+    build.add_argument("-c", "--country", type=str.upper, required=True, help="Any phonenumbers region code")
+    build.add_argument("-n", "--count", type=int, required=True)
+    build.add_argument("-o", "--output", required=True)
+    build.add_argument("-s", "--seed", type=int)
+    build.add_argument("-u", "--unique", action="store_true", help="No number appears twice in the pool")
+    draw = commands.add_parser("draw", help="Print numbers from a pool")
+    draw.add_argument("pool")
+    draw.add_argument("-n", "--count", type=int, default=10)
+    draw.add_argument("-s", "--seed", type=int)
+    draw.add_argument("--sequential", action="store_true", help="Read in pool order instead of at random")
+    draw.add_argument("--start", type=int, default=0, help="First index for --sequential")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.country not in default_registry():
+            parser.error(f"unknown country: {args.country}")
+        written = build_pool(args.output, args.country, args.count, args.seed, args.unique)
+        print(f"{written} numbers written to {args.output}", file=sys.stderr)
+        return 0
+
+    pool = NumberPool(args.pool)
+    if not len(pool):
+        parser.error(f"{args.pool} is empty")
+    if args.sequential:
+        numbers = pool.take(args.start, args.count, as_bytes=True)
+    else:
+        numbers = pool.draw_batch(args.count, np.random.default_rng(args.seed), as_bytes=True)
+    out = sys.stdout.buffer
+    for start in range(0, len(numbers), BUILD_CHUNK):
+        out.write(b"\n".join(numbers[start:start + BUILD_CHUNK].tolist()) + b"\n")
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
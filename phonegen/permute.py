@@ -0,0 +1,70 @@
+import random
+
+# Keyed pseudo-random permutation of range(size), for walking a NumberSpace
+# in an order that looks random but visits every number exactly once:
+# position i of the walk is number permutation[i], so a whole walk is
+# resumed from its key and a single counter, with no set of numbers drawn.
+#
+# A balanced Feistel network over the smallest even number of bits covering
+# size is a bijection on that power of two (at most 4 * size values); values
+# that land outside range(size) are encrypted again ("cycle walking") until
+# they fall inside, which keeps it a bijection on range(size). Each round
+# mixes one half with the SplitMix64 finalizer and a round key.
+
+ROUNDS = 6
+MASK64 = (1 << 64) - 1
+
+
+class KeyedPermutation:
+    """A bijection of ``range(size)`` chosen by ``key`` (any str/int)."""
+
+    def __init__(self, size, key):
+        self.size = size
+        self.half = max((size - 1).bit_length() + 1, 2) // 2
+        self.mask = (1 << self.half) - 1
+        key_rng = random.Random(f"permutation-{key}")
+        self.keys = [key_rng.getrandbits(64) for _ in range(ROUNDS)]
+
+    def __len__(self):
+        return self.size
+
+    def _encrypt(self, x):
+        mask = self.mask
+        left, right = x >> self.half, x & mask
+        for key in self.keys:
+            f = right ^ key
+            f = (f ^ (f >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+            f = (f ^ (f >> 27)) * 0x94D049BB133111EB & MASK64
+            left, right = right, left ^ (f ^ (f >> 31)) & mask
+        return left << self.half | right
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.size:
+            raise IndexError(f"Index {i} outside permutation of size {self.size}")
+        x = self._encrypt(i)
+        while x >= self.size:
+            x = self._encrypt(x)
+        return x
+
+    def _encrypt_batch(self, x):
+        import numpy as np
+        half, mask = np.uint64(self.half), np.uint64(self.mask)
+        left, right = x >> half, x & mask
+        for key in self.keys:
+            f = right ^ np.uint64(key)
+            f = (f ^ (f >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            f = (f ^ (f >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            left, right = right, left ^ ((f ^ (f >> np.uint64(31))) & mask)
+        return left << half | right
+
+    def take(self, start, n):
+        """Positions ``start:start + n`` of the permutation as an int64 NumPy array."""
+        import numpy as np
+        if start < 0 or start + n > self.size:
+            raise IndexError(f"Range {start}:{start + n} outside permutation of size {self.size}")
+        x = self._encrypt_batch(np.arange(start, start + n, dtype=np.uint64))
+        outside = np.flatnonzero(x >= self.size)
+        while len(outside):
+            x[outside] = self._encrypt_batch(x[outside])
+            outside = outside[x[outside] >= self.size]
+        return x.astype(np.int64)
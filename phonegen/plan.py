@@ -0,0 +1,200 @@
+import random
+
+# "Generate Phone All" runs follow a GenerationPlan: an exact number of
+# records per country, given as quotas (KH=5000,TH=3000) or as weights that
+# split the run's count (KH=2,TH=1, largest remainders get the rounding).
+# Without either, the registry's countries get equal shares.
+#
+# Any range of the run holds a fixed number of records per country
+# (``counts_between``), computed in closed form, so chunks on other
+# processes, resumed runs and the GUI all agree on every country's share.
+# Records are made in batches of BATCH_SIZE with one generate_batch draw per
+# country. A batch's RNG depends only on the run's key and the batch index,
+# so a batch comes out the same whichever process generates it, and
+# generating it again on resume gives the same records. "interleave" shuffles
+# each batch and spreads every country evenly over the run; "group" writes
+# the countries one after the other in plan order. A generator walking
+# permuted orders (Generate(permute=True)) starts every batch at each
+# country's count of records before it, so that also holds for its numbers.
+
+PLAN_ORDERS = ["interleave", "group"]
+BATCH_SIZE = 10_000
+# Batches smaller than this are drawn one number at a time with Python's
+# random instead of NumPy, so short runs start fast
+SMALL_BATCH = 1000
+
+
+class GenerationPlan:
+    """How many records each country gets in a mixed run."""
+
+    def __init__(self, quotas, order="interleave"):
+        if order not in PLAN_ORDERS:
+            raise ValueError(f"plan order must be one of {', '.join(PLAN_ORDERS)}")
+        self.order = order
+        self.quotas = {}
+        for country, n in quotas.items():
+            if int(n) != n or n < 0:
+                raise ValueError(f"quota for {country} must be a whole number >= 0")
+            self.quotas[country.upper()] = int(n)
+        self.countries = list(self.quotas)
+        self.total = sum(self.quotas.values())
+
+    @classmethod
+    def from_weights(cls, weights, count, order="interleave"):
+        """Split ``count`` records between countries in proportion to ``weights``."""
+        from fractions import Fraction
+        weights = {country: Fraction(weight) for country, weight in weights.items()}
+        total_weight = sum(weights.values())
+        if any(weight < 0 for weight in weights.values()) or total_weight <= 0:
+            raise ValueError("weights must be >= 0 and not all 0")
+        shares = {country: count * weight / total_weight for country, weight in weights.items()}
+        quotas = {country: int(share) for country, share in shares.items()}
+        # Largest remainders first; ties go to the country listed first
+        by_remainder = sorted(shares, key=lambda country: quotas[country] - shares[country])
+        for country in by_remainder[:count - sum(quotas.values())]:
+            quotas[country] += 1
+        return cls(quotas, order)
+
+    def to_dict(self):
+        return {"quotas": dict(self.quotas), "order": self.order}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["quotas"], data.get("order", "interleave"))
+
+    def counts_before(self, position):
+        """Records of each country (in plan order) among the first ``position``."""
+        position = min(max(position, 0), self.total)
+        quotas = list(self.quotas.values())
+        if self.order == "group":
+            counts, offset = [], 0
+            for quota in quotas:
+                counts.append(min(max(position - offset, 0), quota))
+                offset += quota
+            return counts
+        return _interleaved(quotas, position)
+
+    def counts_between(self, start, stop):
+        """``{country: records}`` of records ``start:stop``, countries without any left out."""
+        before = self.counts_before(start)
+        upto = self.counts_before(stop)
+        return {country: b - a for country, a, b in zip(self.countries, before, upto) if b > a}
+
+
+def _interleaved(quotas, position):
+    # The two halves of the country list share the first ``position``
+    # records in proportion to their totals, and so on down to single
+    # countries: exact at the end of the run and never decreasing, so any
+    # range gets counts_before(stop) - counts_before(start)
+    if len(quotas) == 1:
+        return [position]
+    half = len(quotas) // 2
+    left, total = sum(quotas[:half]), sum(quotas)
+    in_left = position * left // total if total else 0
+    return _interleaved(quotas[:half], in_left) + _interleaved(quotas[half:], position - in_left)
+
+
+def parse_shares(value):
+    """``{country: share}`` from "KH=2,TH=1" or a mapping; shares are Fractions."""
+    from fractions import Fraction
+    if isinstance(value, str):
+        items = []
+        for part in value.split(","):
+            country, sep, share = part.partition("=")
+            if not sep or not country.strip():
+                raise ValueError(f"expected COUNTRY=NUMBER, got {part.strip()!r}")
+            items.append((country, share))
+    elif isinstance(value, dict):
+        items = list(value.items())
+    else:
+        raise ValueError("shares must be COUNTRY=NUMBER,... or an object")
+    shares = {}
+    for country, share in items:
+        try:
+            shares[str(country).strip().upper()] = Fraction(share.strip() if isinstance(share, str) else share)
+        except (TypeError, ValueError, ZeroDivisionError):
+            raise ValueError(f"{str(country).strip()}: {share!r} is not a number")
+    return shares
+
+
+def make_plan(count=None, quotas=None, weights=None, order="interleave", registry=None):
+    """The plan of a mixed run: ``quotas`` (then ``count`` is their sum),
+    ``weights`` of ``count``, or equal shares of the registry's countries.
+    Raises ValueError for bad shares and countries the registry lacks."""
+    if registry is None:
+        from phonegen.registry import default_registry
+        registry = default_registry()
+    if quotas is not None:
+        plan = GenerationPlan(parse_shares(quotas), order)
+    else:
+        weights = parse_shares(weights) if weights is not None else dict.fromkeys(registry.countries, 1)
+        plan = GenerationPlan.from_weights(weights, count, order)
+    unknown = [country for country in plan.countries if country not in registry]
+    if unknown:
+        raise ValueError(f"unknown countries in plan: {', '.join(unknown)}")
+    return plan
+
+
+def batch_first(position):
+    """First record of the batch that record ``position`` belongs to."""
+    return position - position % BATCH_SIZE
+
+
+def _batch_seed(key, batch):
+    return random.Random(f"{key}-{batch}").getrandbits(64)
+
+
+def iter_plan_records(generator, plan, start=0, stop=None, key=None):
+    """Yield ``(country, "", phone)`` records ``start:stop`` of ``plan``.
+
+    Batches are seeded from ``key`` (default: the generator's plan key).
+    ``phone`` is None where a country has no numbers left to draw (an
+    exhausted unique run or a region without numbers).
+    """
+    for countries, phones in iter_plan_batches(generator, plan, start, stop, key):
+        for country, phone in zip(countries, phones):
+            yield country, "", phone
+
+
+def iter_plan_batches(generator, plan, start=0, stop=None, key=None):
+    """Yield the records of ``iter_plan_records`` as ``(countries, phones)`` lists, one per batch."""
+    stop = plan.total if stop is None else min(stop, plan.total)
+    key = generator.plan_key() if key is None else key
+    for batch_start in range(batch_first(start), stop, BATCH_SIZE):
+        batch_stop = min(batch_start + BATCH_SIZE, plan.total)
+        seed = _batch_seed(key, batch_start // BATCH_SIZE)
+        counts = plan.counts_between(batch_start, batch_stop)
+        if generator.permute:
+            generator.walks.update(zip(plan.countries, plan.counts_before(batch_start)))
+        if batch_stop - batch_start < SMALL_BATCH:
+            countries, phones = _draw_small(generator, counts, seed, plan.order)
+        else:
+            countries, phones = _draw(generator, counts, seed, plan.order)
+        lo, hi = max(start, batch_start) - batch_start, stop - batch_start
+        yield countries[lo:hi], phones[lo:hi]
+
+
+def _draw(generator, counts, seed, order):
+    # One generate_batch per country, shuffled together for "interleave"
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    countries, phones = [], []
+    for country, n in counts.items():
+        batch = generator.generate_batch(country, n, rng=rng)
+        batch = batch.tolist() if batch is not None else []
+        phones.extend(batch + [None] * (n - len(batch)))
+        countries.extend([country] * n)
+    if order == "interleave":
+        shuffled = rng.permutation(len(phones)).tolist()
+        countries = [countries[i] for i in shuffled]
+        phones = [phones[i] for i in shuffled]
+    return countries, phones
+
+
+def _draw_small(generator, counts, seed, order):
+    rng = random.Random(seed)
+    records = [(country, generator.generate_and_validate_phone(country, rng))
+               for country, n in counts.items() for _ in range(n)]
+    if order == "interleave":
+        rng.shuffle(records)
+    return [country for country, _ in records], [phone for _, phone in records]
@@ -0,0 +1,261 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from phonegen.checkpoint import RunCheckpoint
+from phonegen.control import POLL_INTERVAL, RunCancelled
+from phonegen.generate import GENERATE_ALL, Generate, format_line, iter_lines, iter_records
+from phonegen.plan import GenerationPlan, iter_plan_records, make_plan
+from phonegen.writer import BufferedWriter
+
+# Large runs are split into fixed-size chunks that worker processes generate
+# into scratch files; the parent appends finished chunks to the real outputs
+# in chunk order, so the result is the same whatever the number of workers.
+# A shared RunControl is given to every worker process; a cancelled run
+# drops the chunks still in flight and keeps everything merged before.
+# "Generate Phone All" chunks are ranges of one GenerationPlan whose batches
+# are seeded by the run, so every country gets its exact share. Permuted
+# runs start each chunk's walk at the chunk's first record.
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Chunks submitted per worker ahead of the one being merged, so scratch
+# files on disk stay bounded however long the run is
+LOOKAHEAD = 2
+
+# RunControl of the run this worker process belongs to
+_control = None
+
+
+def _init_worker(control):
+    global _control
+    _control = control
+
+
+def _chunk_seed(seed, chunk):
+    return f"{seed}-{chunk}"
+
+
+def _chunk_records(chunk, count, country, language, mode, seed, names_dir, number_format, plan, start, shard,
+                   permute):
+    generator = Generate(rng=random.Random(_chunk_seed(seed, chunk)), names_dir=names_dir,
+                         number_format=number_format, shard=shard, permute=permute, key=seed)
+    if plan is not None:
+        records = iter_plan_records(generator, plan, start, start + count, key=seed)
+    else:
+        generator.walks[country] = start
+        records = iter_records(generator, country, language, mode, count)
+    if _control is not None:
+        records = _control.check(records)
+    return (record for record in records if record[2])
+
+
+def render_chunk(task):
+    """One chunk's records as UTF-8 ``fmt`` lines (no csv header).
+
+    Same records as the matching chunk of ``iter_chunks``, so a seeded
+    stream is identical however it was produced.
+    """
+    chunk, count, country, language, mode, fmt, seed, names_dir, number_format, plan, start, shard, permute = task
+    records = _chunk_records(chunk, count, country, language, mode, seed, names_dir, number_format, plan, start,
+                             shard, permute)
+    return "".join(iter_lines(records, fmt, header=False)).encode("utf-8")
+
+
+def _generate_chunk(task):
+    (chunk, count, country, language, mode, fmt, seed, chunk_dir, names_dir, number_format, plan, start, shard,
+     permute) = task
+    records = _chunk_records(chunk, count, country, language, mode, seed, names_dir, number_format, plan, start,
+                             shard, permute)
+    os.makedirs(chunk_dir)
+    counts = {}
+    if fmt is None:
+        with BufferedWriter(chunk_dir, fsync=False) as writer:
+            for record_country, name, phone in records:
+                writer.write(f"{record_country}_phones.txt", format_line(name, phone))
+                counts[record_country] = counts.get(record_country, 0) + 1
+    else:
+        def counted(records):
+            for record in records:
+                counts[record[0]] = counts.get(record[0], 0) + 1
+                yield record
+
+        with open(os.path.join(chunk_dir, "records"), mode="w", encoding="utf-8", newline="") as f:
+            f.writelines(iter_lines(counted(records), fmt, header=False))
+    return chunk_dir, counts
+
+
+def iter_chunks(country, language, mode, count, fmt=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                seed=None, workdir=None, start_chunk=0, names_dir=None, control=None, number_format="e164",
+                plan=None, shard=None, permute=False):
+    """Generate ``count`` records across processes, in chunk order.
+
+    Yields ``(chunk_dir, counts)`` with the records per country in
+    ``counts``. Each chunk directory holds either per-country
+    ``{country}_phones.txt`` files (``fmt=None``) or a single ``records``
+    file in ``fmt``. The
+    caller merges and then removes it. Chunks depend only on ``seed`` and
+    their index, so a run can restart at ``start_chunk``. With a shared
+    ``control`` the workers pause with the run, and iteration ends early
+    when it is cancelled. Numbers are written in ``number_format``.
+    "Generate Phone All" runs follow ``plan`` (default: equal shares).
+    Numbers come from ``shard=(index, count)`` of each space if given, in
+    the run's permuted order with ``permute``.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if language == GENERATE_ALL and plan is None:
+        plan = make_plan(count)
+    workdir = workdir or tempfile.mkdtemp(prefix="phonegen-")
+    tasks = ((chunk, min(chunk_size, count - chunk * chunk_size), country, language, mode, fmt, seed,
+              os.path.join(workdir, f"chunk-{chunk:06d}"), names_dir, number_format, plan, chunk * chunk_size,
+              shard, permute)
+             for chunk in range(start_chunk, (count + chunk_size - 1) // chunk_size))
+    initargs = (control,) if control is not None and control.shared else (None,)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+    window = (workers or os.cpu_count() or 1) * LOOKAHEAD
+    futures = deque(executor.submit(_generate_chunk, task) for _, task in zip(range(window), tasks))
+    try:
+        while futures:
+            future = futures[0]
+            # Wait in short slices so a cancel is noticed while a chunk runs
+            while control is not None and not future.done():
+                if not control.wait():
+                    return
+                wait([future], timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if control is not None and not control.wait():
+                return
+            try:
+                result = future.result()
+            except RunCancelled:
+                return  # cancelled between the check and the result
+            futures.popleft()
+            # Keep the workers busy while the caller merges this chunk
+            task = next(tasks, None)
+            if task is not None:
+                futures.append(executor.submit(_generate_chunk, task))
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+        if control is not None and control.cancelled:
+            # Running chunks stop at their next check; give them until the
+            # deadline to do so, then leave them behind
+            running = [future for future in futures if not future.done()]
+            if running and control.remaining():
+                wait(running, timeout=control.remaining())
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown(wait=True)
+
+
+def _append(source, destination):
+    with open(source, mode="rb") as src, open(destination, mode="ab") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+
+
+def generate_to_directory(country, language, mode, count, output_dir, workers=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE, seed=None, lock=None, checkpoint_path=None, control=None,
+                          plan=None, shard=None, names_dir=None, number_format="e164", permute=False):
+    """Append ``count`` records to ``output_dir/{country}_phones.txt`` files.
+
+    With ``checkpoint_path`` a resume point is saved after every merged
+    chunk (see ``resume_to_directory``). A cancelled ``control`` stops the
+    run after the last merged chunk. "Generate Phone All" runs follow
+    ``plan`` (default: equal shares). ``names_dir``, ``number_format`` and
+    ``permute`` are as for ``iter_chunks``. Returns the number of records
+    appended per country.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if language == GENERATE_ALL and plan is None:
+        plan = make_plan(count)
+    checkpoint = None
+    if checkpoint_path:
+        countries = plan.countries if plan is not None else [country]
+        settings = {"country": country, "language": language, "mode": mode, "count": count,
+                    "output_dir": output_dir, "chunk_size": chunk_size, "seed": seed,
+                    "plan": plan.to_dict() if plan is not None else None,
+                    "shard": list(shard) if shard is not None else None,
+                    "names_dir": names_dir, "number_format": number_format, "permute": permute}
+        checkpoint = RunCheckpoint(checkpoint_path, output_dir, [f"{c}_phones.txt" for c in countries], settings)
+        checkpoint.save(0, force=True)
+    return _generate_to_directory(country, language, mode, count, output_dir, workers, chunk_size, seed,
+                                  lock, checkpoint, control, plan, shard, names_dir, number_format, permute)
+
+
+def resume_to_directory(checkpoint_path, workers=None, lock=None, control=None):
+    """Continue a ``generate_to_directory`` run from its last merged chunk."""
+    checkpoint = RunCheckpoint.load(checkpoint_path)
+    checkpoint.rewind()
+    settings = dict(checkpoint.settings)
+    plan = settings.pop("plan", None)
+    shard = settings.pop("shard", None)
+    return _generate_to_directory(settings.pop("country"), settings.pop("language"), settings.pop("mode"),
+                                  settings.pop("count"), settings.pop("output_dir"), workers,
+                                  settings.pop("chunk_size"), settings.pop("seed"), lock, checkpoint, control,
+                                  GenerationPlan.from_dict(plan) if plan else None, tuple(shard) if shard else None,
+                                  settings.pop("names_dir", None), settings.pop("number_format", "e164"),
+                                  settings.pop("permute", False))
+
+
+def _generate_to_directory(country, language, mode, count, output_dir, workers, chunk_size, seed, lock,
+                           checkpoint, control=None, plan=None, shard=None, names_dir=None, number_format="e164",
+                           permute=False):
+    lock = lock or threading.Lock()
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    start_chunk = checkpoint.records_done // chunk_size if checkpoint else 0
+    workdir = tempfile.mkdtemp(prefix="phonegen-", dir=output_dir)
+    try:
+        chunks = iter_chunks(country, language, mode, count, None, workers, chunk_size, seed, workdir, start_chunk,
+                             names_dir=names_dir, control=control, number_format=number_format, plan=plan,
+                             shard=shard, permute=permute)
+        for chunk, (chunk_dir, chunk_counts) in enumerate(chunks, start_chunk):
+            with lock:
+                for record_country, n in chunk_counts.items():
+                    filename = f"{record_country}_phones.txt"
+                    destination = os.path.join(output_dir, filename)
+                    _append(os.path.join(chunk_dir, filename), destination)
+                    counts[record_country] = counts.get(record_country, 0) + n
+                    if checkpoint:
+                        checkpoint.sizes[filename] = os.path.getsize(destination)
+            if checkpoint:
+                checkpoint.save(min((chunk + 1) * chunk_size, count), force=True)
+            shutil.rmtree(chunk_dir)
+        for record_country in counts:
+            with open(os.path.join(output_dir, f"{record_country}_phones.txt"), mode="ab") as f:
+                os.fsync(f.fileno())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return counts
+
+
+def generate_to_stream(stream, country, language, mode, count, fmt, workers=None,
+                       chunk_size=DEFAULT_CHUNK_SIZE, seed=None, names_dir=None, on_chunk=None, control=None,
+                       number_format="e164", plan=None, shard=None, permute=False):
+    """Write ``count`` records in ``fmt`` to the binary ``stream`` in order.
+
+    ``on_chunk(counts, nbytes)`` is called after each chunk is written. A
+    cancelled ``control`` ends the stream after the last whole chunk.
+    """
+    if fmt == "csv":
+        stream.write(b"country,name,phone\n")
+    workdir = tempfile.mkdtemp(prefix="phonegen-")
+    try:
+        for chunk_dir, counts in iter_chunks(country, language, mode, count, fmt, workers, chunk_size, seed,
+                                             workdir, names_dir=names_dir, control=control,
+                                             number_format=number_format, plan=plan, shard=shard,
+                                             permute=permute):
+            path = os.path.join(chunk_dir, "records")
+            with open(path, mode="rb") as f:
+                shutil.copyfileobj(f, stream, 1 << 20)
+            if on_chunk is not None:
+                on_chunk(counts, os.path.getsize(path))
+            shutil.rmtree(chunk_dir)
+    finally:
+        stream.flush()
+        shutil.rmtree(workdir, ignore_errors=True)
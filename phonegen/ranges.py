@@ -0,0 +1,391 @@
+import bisect
+import functools
+import random
+
+# Every national number pattern in phonenumbers' metadata is a small regex
+# made of digits, \d, [..] classes, (?:..) groups, | and {n}/{n,m}/?
+# quantifiers. We expand those patterns once into "templates" (one digit set
+# per position) and sample inside them, so every draw is valid by construction
+# and we never need the parse/is_valid_number retry loop.
+
+ALL_DIGITS = "0123456789"
+
+NUMBER_TYPES = (
+    "fixed_line", "mobile", "toll_free", "premium_rate", "shared_cost",
+    "personal_number", "voip", "pager", "uan", "voicemail",
+)
+
+
+def _parse_class(body, pattern):
+    digits = set()
+    i = 0
+    while i < len(body):
+        if body.startswith("\\d", i):
+            digits.update(ALL_DIGITS)
+            i += 2
+        elif i + 2 < len(body) and body[i + 1] == "-":
+            digits.update(str(d) for d in range(int(body[i]), int(body[i + 2]) + 1))
+            i += 3
+        elif body[i].isdigit():
+            digits.add(body[i])
+            i += 1
+        else:
+            raise ValueError(f"Unsupported character class [{body}] in {pattern!r}")
+    return "".join(sorted(digits))
+
+
+def _parse_alt(pattern, i):
+    branches = []
+    seq, i = _parse_seq(pattern, i)
+    branches.append(seq)
+    while i < len(pattern) and pattern[i] == "|":
+        seq, i = _parse_seq(pattern, i + 1)
+        branches.append(seq)
+    return branches, i
+
+
+def _parse_seq(pattern, i):
+    items = []
+    while i < len(pattern) and pattern[i] not in "|)":
+        c = pattern[i]
+        if c == "(":
+            i += 3 if pattern.startswith("(?:", i) else 1
+            atom, i = _parse_alt(pattern, i)
+            if i >= len(pattern) or pattern[i] != ")":
+                raise ValueError(f"Unbalanced group in {pattern!r}")
+            i += 1
+        elif c == "[":
+            end = pattern.index("]", i)
+            atom = _parse_class(pattern[i + 1:end], pattern)
+            i = end + 1
+        elif pattern.startswith("\\d", i):
+            atom = ALL_DIGITS
+            i += 2
+        elif c.isdigit():
+            atom = c
+            i += 1
+        else:
+            raise ValueError(f"Unsupported regex syntax {c!r} in {pattern!r}")
+
+        low = high = 1
+        if i < len(pattern) and pattern[i] == "?":
+            low, high = 0, 1
+            i += 1
+        elif i < len(pattern) and pattern[i] == "{":
+            end = pattern.index("}", i)
+            bounds = pattern[i + 1:end].split(",")
+            low = int(bounds[0])
+            high = int(bounds[-1]) if bounds[-1] else None
+            i = end + 1
+        items.append((atom, low, high))
+    return items, i
+
+
+def parse_pattern(pattern):
+    branches, i = _parse_alt(pattern, 0)
+    if i != len(pattern):
+        raise ValueError(f"Unbalanced group in {pattern!r}")
+    return branches
+
+
+def _intersect(a, b):
+    return "".join(d for d in a if d in b)
+
+
+def _extend(branches, partials, constraint):
+    out = set()
+    for seq in branches:
+        current = partials
+        for atom, low, high in seq:
+            current = _repeat(atom, low, high, current, constraint)
+            if not current:
+                break
+        out.update(current)
+    return out
+
+
+def _repeat(atom, low, high, partials, constraint):
+    out = set()
+    current = partials
+    limit = len(constraint) if high is None else high
+    for k in range(limit + 1):
+        if k >= low:
+            out.update(current)
+        if k == limit:
+            break
+        current = _once(atom, current, constraint)
+        if not current:
+            break
+    return out
+
+
+def _once(atom, partials, constraint):
+    if not isinstance(atom, str):
+        return _extend(atom, partials, constraint)
+    out = set()
+    for template in partials:
+        pos = len(template)
+        if pos < len(constraint):
+            digits = _intersect(atom, constraint[pos])
+            if digits:
+                out.add(template + (digits,))
+    return out
+
+
+def expand_pattern(pattern, constraint):
+    """Expand a metadata pattern into templates matching ``constraint``.
+
+    ``constraint`` is a tuple of digit sets, one per position; only templates
+    of exactly that length are returned.
+    """
+    templates = _extend(parse_pattern(pattern), {()}, constraint)
+    return {t for t in templates if len(t) == len(constraint)}
+
+
+def _disjoint(suffixes, memo):
+    # Split overlapping templates (e.g. identical fixed_line and mobile
+    # patterns) into a disjoint set so each number has exactly one index.
+    if len(suffixes) == 1:
+        return list(suffixes)
+    if suffixes in memo:
+        return memo[suffixes]
+    groups = {}
+    for d in ALL_DIGITS:
+        rest = frozenset(s[1:] for s in suffixes if d in s[0])
+        if rest:
+            groups.setdefault(rest, []).append(d)
+    out = []
+    for rest, digits in groups.items():
+        head = "".join(digits)
+        out.extend((head,) + tail for tail in _disjoint(rest, memo))
+    memo[suffixes] = out
+    return out
+
+
+def _matches_length(desc, length):
+    return not desc.possible_length or length in desc.possible_length
+
+
+def _meet(templates, others):
+    # Numbers in both template sets: position-wise intersection of each pair
+    out = set()
+    for a in templates:
+        for b in others:
+            t = tuple(_intersect(x, y) for x, y in zip(a, b))
+            if all(t):
+                out.add(t)
+    return out
+
+
+def _minus(templates, others):
+    # Numbers in ``templates`` but none of ``others``: a template minus b
+    # splits at the first position whose digit falls outside b
+    out = set(templates)
+    for b in others:
+        rest = set()
+        for a in out:
+            if not all(_intersect(x, y) for x, y in zip(a, b)):
+                rest.add(a)
+                continue
+            for i in range(len(a)):
+                digits = "".join(d for d in a[i] if d not in b[i])
+                if digits:
+                    rest.add(tuple(_intersect(x, y) for x, y in zip(a[:i], b[:i])) + (digits,) + a[i + 1:])
+        out = rest
+    return out
+
+
+def _valid_templates(metadata, constraint):
+    templates = set()
+    for number_type in NUMBER_TYPES:
+        desc = getattr(metadata, number_type)
+        if desc is None or desc.national_number_pattern is None:
+            continue
+        if not _matches_length(desc, len(constraint)):
+            continue
+        templates |= expand_pattern(desc.national_number_pattern, constraint)
+    return templates
+
+
+def _claimed_templates(metadata, constraint):
+    # What phonenumbers assigns to this region when it comes first under the
+    # shared country code: anything starting with its leading digits, or
+    # without those, anything valid for it
+    if metadata.leading_digits:
+        pattern = f"(?:{metadata.leading_digits})\\d{{0,{len(constraint)}}}"
+        return expand_pattern(pattern, constraint)
+    return _valid_templates(metadata, constraint)
+
+
+class NumberSpace:
+    """All valid numbers of one country/prefix set, addressable by index.
+
+    Index ``i`` in ``range(size)`` maps to exactly one valid number and the
+    mapping is ordered, so the space can be sampled, sliced or enumerated
+    without ever validating a candidate.
+    """
+
+    def __init__(self, country_code, templates):
+        self.country_code = country_code
+        self.prefix = f"+{country_code}"
+        self.templates = sorted(templates)
+        self.starts = []
+        # Trailing \d positions are decoded in one step as a zero-padded int
+        self._decoders = []
+        total = 0
+        for template in self.templates:
+            self.starts.append(total)
+            tail = 0
+            while tail < len(template) and template[-1 - tail] == ALL_DIGITS:
+                tail += 1
+            head = tuple(reversed(template[:len(template) - tail]))
+            self._decoders.append((head, tail, 10 ** tail))
+            block = 1
+            for digits in template:
+                block *= len(digits)
+            total += block
+        self.size = total
+        self._tables = None
+
+    def national_number_at(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"Index {index} outside number space of size {self.size}")
+        k = bisect.bisect_right(self.starts, index) - 1
+        head, tail, modulus = self._decoders[k]
+        rest, low = divmod(index - self.starts[k], modulus)
+        digits = []
+        for choices in head:
+            rest, r = divmod(rest, len(choices))
+            digits.append(choices[r])
+        digits.reverse()
+        if tail:
+            digits.append(str(low).zfill(tail))
+        return "".join(digits)
+
+    def number_at(self, index):
+        return self.prefix + self.national_number_at(index)
+
+    def sample(self, rng=random):
+        return self.number_at(rng.randrange(self.size))
+
+    def _batch_tables(self):
+        # Per-template radix and digit lookup tables for vectorized decoding
+        if self._tables is None:
+            import numpy as np
+            length = len(self.templates[0]) if self.templates else 0
+            radix = np.ones((len(self.templates), length), dtype=np.int64)
+            lookup = np.zeros((len(self.templates), length, len(ALL_DIGITS)), dtype=np.uint8)
+            for t, template in enumerate(self.templates):
+                for pos, choices in enumerate(template):
+                    radix[t, pos] = len(choices)
+                    lookup[t, pos, :len(choices)] = np.frombuffer(choices.encode("ascii"), dtype=np.uint8)
+            self._tables = np.asarray(self.starts, dtype=np.int64), radix, lookup
+        return self._tables
+
+    def numbers_at(self, indices, as_bytes=False):
+        """Vectorized ``number_at``: map an array of indices to E.164 strings.
+
+        Returns a NumPy array of fixed-width strings (``S`` dtype when
+        ``as_bytes`` is set, ``U`` otherwise).
+        """
+        import numpy as np
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= self.size):
+            raise IndexError(f"Index outside number space of size {self.size}")
+        starts, radix, lookup = self._batch_tables()
+        prefix = np.frombuffer(self.prefix.encode("ascii"), dtype=np.uint8)
+        width = len(prefix) + radix.shape[1]
+
+        out = np.empty((indices.size, width), dtype=np.uint8)
+        out[:, :len(prefix)] = prefix
+        t = np.searchsorted(starts, indices, side="right") - 1
+        rest = indices - starts[t]
+        for pos in range(radix.shape[1] - 1, -1, -1):
+            base = radix[t, pos]
+            out[:, len(prefix) + pos] = lookup[t, pos, rest % base]
+            rest //= base
+
+        numbers = out.view(f"S{width}").ravel()
+        return numbers if as_bytes else numbers.astype(f"U{width}")
+
+    def sample_batch(self, n, rng=None, as_bytes=False):
+        import numpy as np
+        if rng is None:
+            rng = np.random.default_rng()
+        return self.numbers_at(rng.integers(0, self.size, size=n, dtype=np.int64), as_bytes)
+
+    def shard(self, index, count):
+        """Shard ``index`` of ``count``: every ``count``-th number from ``index`` on."""
+        return SpaceShard(self, index, count)
+
+
+class SpaceShard(NumberSpace):
+    """One of ``count`` disjoint slices of a NumberSpace.
+
+    Index ``i`` of the shard is index ``index + i * count`` of the whole
+    space, so the shards of one space never share a number and each spreads
+    over all of its prefixes. Same interface as NumberSpace.
+    """
+
+    def __init__(self, space, index, count):
+        if not 0 <= index < count:
+            raise ValueError(f"shard index must be in 0..{count - 1}, got {index}")
+        self.space = space
+        self.index = index
+        self.count = count
+        self.country_code = space.country_code
+        self.prefix = space.prefix
+        self.templates = space.templates
+        self.size = max(space.size - index + count - 1, 0) // count
+
+    def national_number_at(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"Index {index} outside number space of size {self.size}")
+        return self.space.national_number_at(self.index + index * self.count)
+
+    def numbers_at(self, indices, as_bytes=False):
+        import numpy as np
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= self.size):
+            raise IndexError(f"Index outside number space of size {self.size}")
+        return self.space.numbers_at(self.index + indices * self.count, as_bytes)
+
+
+@functools.lru_cache(maxsize=None)
+def number_space(region, prefixes, length):
+    """Build the valid number space for ``region``.
+
+    ``prefixes`` are E.164 prefixes such as ``("+85596", "+85597")`` and
+    ``length`` is the national number length to generate.
+    """
+    # phonenumbers' metadata is only imported once a space is actually built
+    from phonenumbers import PhoneMetadata
+
+    metadata = PhoneMetadata.metadata_for_region(region)
+    if metadata is None:
+        raise ValueError(f"Unknown region: {region}")
+    country_prefix = f"+{metadata.country_code}"
+    if not _matches_length(metadata.general_desc, length):
+        return NumberSpace(metadata.country_code, [])
+
+    # Regions sharing a country code (CA and the Caribbean under +1, GG/JE
+    # under +44, ...) keep only the numbers phonenumbers routes to them: those
+    # matching their leading digits that no region listed before them claims
+    from phonenumbers import COUNTRY_CODE_TO_REGION_CODE
+    shared = COUNTRY_CODE_TO_REGION_CODE.get(metadata.country_code, ())
+    earlier = [PhoneMetadata.metadata_for_region(r) for r in shared[:shared.index(region)]] if region in shared else []
+
+    templates = set()
+    for prefix in prefixes:
+        if not prefix.startswith(country_prefix):
+            raise ValueError(f"Prefix {prefix} does not belong to {region} ({country_prefix})")
+        national = prefix[len(country_prefix):]
+        constraint = tuple(national) + (ALL_DIGITS,) * (length - len(national))
+        own = _valid_templates(metadata, constraint)
+        if len(shared) > 1 and metadata.leading_digits:
+            own = _meet(own, _claimed_templates(metadata, constraint))
+        for other in earlier:
+            if own and other is not None:
+                own = _minus(own, _claimed_templates(other, constraint))
+        templates |= own
+    return NumberSpace(metadata.country_code, _disjoint(frozenset(templates), {}))
@@ -0,0 +1,183 @@
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from phonegen.ranges import NumberSpace, number_space
+
+# Markets (prefixes, national number length, name language) come from a JSON
+# file, phonegen/data/countries.json unless $PHONEGEN_COUNTRIES points at
+# another one:
+#
+#   {"countries": ["KH", ...],          # shown in the UI and used by "Generate Phone All"
+#    "default_language": "English",
+#    "markets": {"KH": {"prefixes": ["+85596", ...], "length": 9, "language": "Khmer"}, ...}}
+#
+# Every key is optional per market. Any other phonenumbers region works too:
+# it gets the whole country code as prefix and its longest mobile length.
+#
+# phonenumbers is imported only when a number space has to be built or an
+# unconfigured region is looked up. Built spaces are also kept in a small
+# cache file ($PHONEGEN_CACHE_DIR, default ~/.cache/phonegen; set it empty to
+# turn the cache off), so short-lived processes that generate from known
+# markets never load phonenumbers at all. The cache is dropped whenever the
+# installed phonenumbers changes.
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "countries.json")
+REGISTRY_ENV = "PHONEGEN_COUNTRIES"
+CACHE_ENV = "PHONEGEN_CACHE_DIR"
+# Bump when the template expansion in phonegen.ranges changes
+CACHE_VERSION = 2
+
+Market = namedtuple("Market", "code prefixes length language")
+
+
+def _supported_regions():
+    import phonenumbers
+    return phonenumbers.SUPPORTED_REGIONS
+
+
+class Registry:
+    def __init__(self, markets, countries, default_language="English"):
+        self.default_language = default_language
+        self.configured = {code.upper(): self._compile(code, entry) for code, entry in markets.items()}
+        self.markets = dict(self.configured)
+        self.countries = list(countries)
+        self.spaces = {}
+        unknown = [code for code in self.countries
+                   if code not in self.configured and code not in _supported_regions()]
+        if unknown:
+            raise ValueError(f"Unknown countries in registry: {', '.join(unknown)}")
+
+    def _compile(self, code, entry):
+        # Missing prefixes and length are worked out from the metadata on
+        # first use
+        prefixes = tuple(entry["prefixes"]) if entry.get("prefixes") else None
+        return Market(code.upper(), prefixes, entry.get("length"), entry.get("language", self.default_language))
+
+    def __contains__(self, code):
+        return code in self.markets or code in _supported_regions()
+
+    def get(self, code):
+        """The Market for ``code``; unconfigured regions are set up on first use."""
+        market = self.markets.get(code)
+        if market is not None and market.prefixes is not None and market.length is not None:
+            return market
+        if market is None:
+            if code not in _supported_regions():
+                return None
+            market = self._compile(code, {})
+        from phonenumbers import PhoneMetadata
+        metadata = PhoneMetadata.metadata_for_region(code)
+        if metadata is None:
+            raise ValueError(f"Unknown region in registry: {code}")
+        prefixes = market.prefixes or (f"+{metadata.country_code}",)
+        length = market.length or _default_length(code, prefixes)
+        market = self.markets[code] = market._replace(prefixes=prefixes, length=length)
+        return market
+
+    def number_space(self, code):
+        space = self.spaces.get(code)
+        if space is None:
+            key = self._space_key(code)
+            space = load_cached_space(key)
+            if space is None:
+                market = self.get(code)
+                if market is None:
+                    return None
+                space = number_space(code, market.prefixes, market.length)
+                save_cached_space(key, space)
+            self.spaces[code] = space
+        return space
+
+    def _space_key(self, code):
+        # Cached under the configured entry, so a cache hit needs no metadata
+        market = self.configured.get(code)
+        if market is None:
+            return f"{code}::"
+        return f"{code}:{','.join(market.prefixes or ())}:{market.length or ''}"
+
+    def language(self, code):
+        market = self.configured.get(code)
+        return market.language if market else self.default_language
+
+    def regions(self):
+        return sorted(_supported_regions())
+
+
+def _default_length(region, prefixes):
+    # Longest mobile length with numbers under the prefixes, else any length
+    from phonenumbers import PhoneMetadata
+    metadata = PhoneMetadata.metadata_for_region(region)
+    mobile = sorted(metadata.mobile.possible_length or (), reverse=True) if metadata.mobile else []
+    for length in mobile + sorted(metadata.general_desc.possible_length, reverse=True):
+        if number_space(region, prefixes, length).size:
+            return length
+    return max(metadata.general_desc.possible_length)
+
+
+def load_registry(path=None):
+    with open(path or DEFAULT_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    markets = data.get("markets", {})
+    return Registry(markets, data.get("countries", list(markets)), data.get("default_language", "English"))
+
+
+@lru_cache(maxsize=None)
+def default_registry():
+    """The registry every module shares, loaded once per process."""
+    return load_registry(os.environ.get(REGISTRY_ENV))
+
+
+# Number space cache: one small JSON file per space, so a process reads only
+# what it uses and concurrent writers never overwrite each other's entries
+
+def _cache_path(key):
+    directory = os.environ.get(CACHE_ENV)
+    if directory is None:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        directory = os.path.join(base, "phonegen")
+    if not directory:
+        return None
+    name = "".join(c if c.isalnum() else "_" for c in key)
+    return os.path.join(directory, "spaces", f"{name}.json")
+
+
+@lru_cache(maxsize=None)
+def _cache_stamp():
+    # Identifies the installed phonenumbers without importing it
+    from importlib.util import find_spec
+    spec = find_spec("phonenumbers")
+    if spec is None or not spec.origin:
+        return None
+    stat = os.stat(spec.origin)
+    return [CACHE_VERSION, spec.origin, stat.st_size, stat.st_mtime_ns]
+
+
+def load_cached_space(key):
+    path = _cache_path(key)
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("key") != key or data.get("stamp") != _cache_stamp():
+        return None
+    return NumberSpace(data["country_code"], [tuple(template) for template in data["templates"]])
+
+
+def save_cached_space(key, space):
+    path = _cache_path(key)
+    if path is None or _cache_stamp() is None:
+        return
+    data = {"key": key, "stamp": _cache_stamp(), "country_code": space.country_code, "templates": space.templates}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # read-only home, full disk...: just don't cache
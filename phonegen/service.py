@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from phonegen.generate import FORMATS, GENERATE_ALL, LANGUAGES
+from phonegen.numformat import NUMBER_FORMATS
+from phonegen.plan import PLAN_ORDERS, make_plan
+from phonegen.pool import render_chunk
+from phonegen.registry import default_registry
+from phonegen.shard import node_seed, parse_shard
+
+# Local HTTP/JSON service so many clients (test workers, scripts) can fetch
+# generated data from one long-lived process:
+#
+#   GET  /generate?country=KH&count=1000&format=csv[&language=..&mode=..&seed=..&number_format=..]
+#   GET  /generate?quotas=KH=500,TH=300[&plan_order=group]   (or weights=KH=2,TH=1&count=..)
+#   GET  /generate?country=KH&count=1000&seed=7&permute=1    (no repeats, see phonegen.permute)
+#   POST /generate  {"country": "KH", "count": 1000, "format": "csv", ...}
+#   GET  /health
+#
+# Requests are served concurrently by one event loop. Records are produced
+# in chunks on a process pool and streamed back (chunked transfer encoding)
+# in order as they finish; a seeded request returns the same bytes as
+# ``python -m phonegen --workers N --seed S`` with the same chunk size.
+# A service started with --shard I/N serves only that shard of the number
+# space (see phonegen.shard), so N services never hand out the same number.
+
+DEFAULT_PORT = 8765
+CHUNK_SIZE = 10_000
+# Chunks computed ahead of the one being sent, per request
+LOOKAHEAD = 4
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1 << 20
+
+CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_params(params, max_count=None):
+    """Validate generation parameters (strings or JSON values) into a dict."""
+    try:
+        count = int(params.get("count", 10))
+        seed = params.get("seed")
+        seed = int(seed) if seed not in (None, "") else random.SystemRandom().getrandbits(64)
+    except (TypeError, ValueError):
+        raise RequestError(400, "count and seed must be integers")
+    run = {
+        "country": str(params.get("country", "KH")).upper(),
+        "language": params.get("language", "Khmer"),
+        "mode": params.get("mode", "Auto"),
+        "format": params.get("format", "txt"),
+        "number_format": params.get("number_format", "e164"),
+        "count": count,
+        "seed": seed,
+        "plan": None,
+        "permute": str(params.get("permute", "")).lower() in ("1", "true", "yes"),
+    }
+    quotas, weights = params.get("quotas"), params.get("weights")
+    if quotas is not None and weights is not None:
+        raise RequestError(400, "give quotas or weights, not both")
+    if quotas is not None or weights is not None:
+        run["language"] = GENERATE_ALL
+    if run["country"] not in default_registry():
+        raise RequestError(400, f"unknown country: {run['country']}")
+    if run["language"] not in LANGUAGES + [GENERATE_ALL]:
+        raise RequestError(400, f"language must be one of {', '.join(LANGUAGES + [GENERATE_ALL])}")
+    if run["mode"] not in ("Auto", "All"):
+        raise RequestError(400, "mode must be Auto or All")
+    if run["format"] not in FORMATS:
+        raise RequestError(400, f"format must be one of {', '.join(FORMATS)}")
+    if run["number_format"] not in NUMBER_FORMATS:
+        raise RequestError(400, f"number_format must be one of {', '.join(NUMBER_FORMATS)}")
+    if run["language"] == GENERATE_ALL and count >= 0:
+        if params.get("plan_order", "interleave") not in PLAN_ORDERS:
+            raise RequestError(400, f"plan_order must be one of {', '.join(PLAN_ORDERS)}")
+        try:
+            run["plan"] = make_plan(count, quotas, weights, params.get("plan_order", "interleave"))
+        except ValueError as e:
+            raise RequestError(400, str(e))
+        count = run["count"] = run["plan"].total
+    if count < 0 or (max_count is not None and count > max_count):
+        raise RequestError(400, f"count must be between 0 and {max_count}" if max_count else "count must be >= 0")
+    return run
+
+
+class GenerationService:
+    def __init__(self, workers=None, chunk_size=CHUNK_SIZE, max_count=None, names_dir=None, executor=None,
+                 shard=None):
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self.shard = shard
+        self.chunk_size = chunk_size
+        self.max_count = max_count
+        self.names_dir = names_dir
+        self.active = 0
+        self.served = 0
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, target, headers, body = await self.read_request(reader)
+                path = urlsplit(target).path
+                if path == "/health":
+                    await self.send_json(writer, 200, {"status": "ok", "active": self.active, "served": self.served})
+                elif path != "/generate":
+                    raise RequestError(404, f"no such endpoint: {path}")
+                elif method == "GET":
+                    await self.generate(writer, dict(parse_qsl(urlsplit(target).query)))
+                elif method == "POST":
+                    try:
+                        params = json.loads(body or b"{}")
+                    except ValueError:
+                        raise RequestError(400, "body must be a JSON object")
+                    if not isinstance(params, dict):
+                        raise RequestError(400, "body must be a JSON object")
+                    await self.generate(writer, params)
+                else:
+                    raise RequestError(405, f"method not allowed: {method}")
+            except RequestError as e:
+                await self.send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise RequestError(413, "request headers too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise RequestError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        body = b""
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "request body too large")
+        if length:
+            body = await reader.readexactly(length)
+        return method.upper(), target, headers, body
+
+    async def send_json(self, writer, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(self.response_head(status, "application/json", {"Content-Length": str(len(body))}) + body)
+        await writer.drain()
+
+    def response_head(self, status, content_type, extra):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                 "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def generate(self, writer, params):
+        run = parse_params(params, self.max_count)
+        loop = asyncio.get_running_loop()
+        seed = node_seed(run["seed"], self.shard)
+        tasks = [(chunk, min(self.chunk_size, run["count"] - start), run["country"], run["language"], run["mode"],
+                  run["format"], seed, self.names_dir, run["number_format"], run["plan"], start, self.shard,
+                  run["permute"])
+                 for chunk, start in enumerate(range(0, run["count"], self.chunk_size))]
+        writer.write(self.response_head(200, CONTENT_TYPES[run["format"]],
+                                        {"Transfer-Encoding": "chunked", "X-Seed": str(run["seed"])}))
+        if run["format"] == "csv":
+            self.write_chunk(writer, b"country,name,phone\n")
+
+        self.active += 1
+        pending = []
+        try:
+            # Keep a few chunks in flight and send them strictly in order;
+            # drain() pauses generation while a slow client catches up
+            for task in tasks:
+                pending.append(loop.run_in_executor(self.executor, render_chunk, task))
+                if len(pending) > LOOKAHEAD:
+                    self.write_chunk(writer, await pending.pop(0))
+                    await writer.drain()
+            while pending:
+                self.write_chunk(writer, await pending.pop(0))
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            self.served += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            self.active -= 1
+
+    @staticmethod
+    def write_chunk(writer, data):
+        if data:
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="phonegen.service", description="Serve generated phone data over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Generator processes (0 = one per CPU core)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Records per streamed chunk")
+    parser.add_argument("--max-count", type=int, help="Largest count a single request may ask for")
+    parser.add_argument("--names", metavar="DIR", help="Directory of weighted name corpora")
+    parser.add_argument("--shard", metavar="I/N", help="Serve only shard I of N of the number space")
+    args = parser.parse_args(argv)
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
+    service = GenerationService(args.workers or os.cpu_count(), args.chunk_size, args.max_count, args.names,
+                                shard=shard)
+
+    def ready(server):
+        address = server.sockets[0].getsockname()
+        print(f"Serving on http://{address[0]}:{address[1]}", file=sys.stderr, flush=True)
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import argparse
+import os
+import random
+import sys
+
+from phonegen.generate import FORMATS
+from phonegen.verify import input_format, read_blocks
+
+# Multi-node runs without shared state: node i of n is started with
+# `--shard i/n` and only draws the numbers at indices i-1, i-1+n, i-1+2n, ...
+# of each country's NumberSpace (NumberSpace.shard), so no two nodes can
+# produce the same number and every node still covers all prefixes. With
+# --unique each node also keeps its own output free of repeats, so the
+# merged result has none either.
+#
+#   python -m phonegen --shard 1/4 -c KH -n 250000 --unique --seed 7 -o kh-1.txt   # on each node
+#   python -m phonegen.shard merge kh-*.txt -o kh.txt --check
+#   python -m phonegen.shard local --nodes 4 -c KH -n 1000000 --unique -o kh.txt  # processes as nodes
+#
+# A seeded node draws from its own seed (node_seed), so nodes given the same
+# --seed do not walk their shards in step.
+
+
+def parse_shard(value):
+    """``(index, count)`` with a 0-based index from "I/N" (1-based, as on the command line)."""
+    number, sep, count = str(value).partition("/")
+    try:
+        number, count = int(number), int(count)
+    except ValueError:
+        raise ValueError(f"expected SHARD/SHARDS such as 2/4, got {value!r}")
+    if not sep or not 1 <= number <= count:
+        raise ValueError(f"expected SHARD/SHARDS with 1 <= SHARD <= SHARDS, got {value!r}")
+    return number - 1, count
+
+
+def format_shard(shard):
+    return f"{shard[0] + 1}/{shard[1]}"
+
+
+def node_seed(seed, shard):
+    # Seed of one node's generator, derived from the run's seed
+    if seed is None or shard is None:
+        return seed
+    return random.Random(f"{seed}-{format_shard(shard)}").getrandbits(63)
+
+
+def node_share(total, nodes, index):
+    """Records node ``index`` makes of ``total``; the shares add up to ``total``."""
+    return total // nodes + (index < total % nodes)
+
+
+def merge_files(paths, output, fmt=None):
+    """Concatenate shard outputs into ``output`` in the order given.
+
+    CSV files (by extension, or all with ``fmt="csv"``) keep the first
+    file's header only. Returns the bytes written.
+    """
+    written = 0
+    with open(output, mode="wb") as out:
+        for i, path in enumerate(paths):
+            with open(path, mode="rb") as f:
+                if i and input_format(path, fmt) == "csv":
+                    f.readline()
+                for block in read_blocks(f):
+                    if not block.endswith(b"\n"):
+                        block += b"\n"
+                    out.write(block)
+                    written += len(block)
+    return written
+
+
+def count_repeats(paths):
+    """``(numbers, repeats)``: E.164 numbers in ``paths`` and how many were seen before."""
+    from phonegen.dedup import PHONE_PATTERN, UniqueIndex
+    import numpy as np
+    index, numbers, repeats = UniqueIndex(), 0, 0
+    for path in paths:
+        with open(path, mode="rb") as f:
+            for block in read_blocks(f):
+                keys = np.array(PHONE_PATTERN.findall(block), dtype=np.int64)
+                numbers += len(keys)
+                repeats += len(keys) - int(index.add_many(keys).sum())
+    return numbers, repeats
+
+
+def report_repeats(paths):
+    numbers, repeats = count_repeats(paths)
+    print(f"{numbers} numbers, {repeats} repeated", file=sys.stderr)
+    return repeats
+
+
+def node_commands(args, extra):
+    # One `python -m phonegen` command line and output file per node
+    quotas = None
+    if args.quotas or args.weights or args.all:
+        from phonegen.plan import make_plan
+        # Split the whole run's plan so the per-country totals are exact
+        plan = make_plan(args.count, args.quotas, args.weights)
+        quotas = plan.quotas
+    commands = []
+    for index in range(args.nodes):
+        shard = format_shard((index, args.nodes))
+        part = f"{args.output}.shard-{index + 1}-of-{args.nodes}"
+        command = [sys.executable, "-m", "phonegen", "--shard", shard, "-o", part, "-f", args.format]
+        if quotas is None:
+            command += ["-n", str(node_share(args.count, args.nodes, index))]
+        else:
+            share = {country: node_share(n, args.nodes, index) for country, n in quotas.items()}
+            share = ",".join(f"{country}={n}" for country, n in share.items() if n)
+            # A node left without records still writes its (empty) output
+            command += ["--quotas", share] if share else ["-n", "0"]
+        commands.append((command + extra, part))
+    return commands
+
+
+def run_local(args, extra):
+    """Run ``args.nodes`` local processes as nodes, then merge their outputs."""
+    import subprocess
+    commands = node_commands(args, extra)
+    processes = [subprocess.Popen(command) for command, _ in commands]
+    status = 0
+    for process in processes:
+        status = process.wait() or status
+    parts = [part for _, part in commands]
+    try:
+        if status:
+            print(f"a node exited with status {status}; outputs not merged", file=sys.stderr)
+            return status
+        merge_files(parts, args.output, args.format)
+        if args.check and report_repeats([args.output]):
+            return 1
+        return 0
+    finally:
+        if not args.keep:
+            for part in parts:
+                if os.path.exists(part):
+                    os.remove(part)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="phonegen.shard", description="Merge and run sharded multi-node generation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="Combine the outputs of the shards of one run")
+    merge.add_argument("inputs", nargs="+", metavar="INPUT")
+    merge.add_argument("-o", "--output", required=True)
+    merge.add_argument("-f", "--format", choices=FORMATS, help="Input format (default: from the extension)")
+    merge.add_argument("--check", action="store_true", help="Count repeated numbers (E.164 output) and exit 1 if any")
+    local = commands.add_parser("local", help="Run every shard as a local process and merge the outputs; "
+                                              "other options are passed on to python -m phonegen",
+                                  allow_abbrev=False)
+    local.add_argument("--nodes", type=int, required=True)
+    local.add_argument("-n", "--count", type=int, default=10)
+    local.add_argument("-o", "--output", required=True)
+    local.add_argument("-f", "--format", choices=FORMATS, default="txt")
+    local.add_argument("--all", action="store_true")
+    shares = local.add_mutually_exclusive_group()
+    shares.add_argument("--quotas", metavar="CC=N,...")
+    shares.add_argument("--weights", metavar="CC=W,...")
+    local.add_argument("--check", action="store_true", help="Count repeated numbers (E.164 output) and exit 1 if any")
+    local.add_argument("--keep", action="store_true", help="Keep the per-node outputs next to the merged file")
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "merge" and extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.command == "merge":
+        missing = [path for path in args.inputs if not os.path.exists(path)]
+        if missing:
+            parser.error(f"no such file: {', '.join(missing)}")
+        merge_files(args.inputs, args.output, args.format)
+        print(f"{len(args.inputs)} files merged into {args.output}", file=sys.stderr)
+        if args.check and report_repeats([args.output]):
+            return 1
+        return 0
+
+    if args.nodes < 1:
+        parser.error("--nodes must be at least 1")
+    try:
+        return run_local(args, extra)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import json
+import time
+
+# Counters and phase timers for one generation run. The hot loop calls
+# ``record`` once per record and ``lap`` at phase boundaries (two clock
+# reads' worth of work); everything else is computed only when a snapshot
+# is taken for a progress update or the final dump.
+
+PHASES = ["generate", "write", "emit"]
+# Shortest span current rates are measured over; snapshots closer together
+# (e.g. worker chunks arriving back to back) repeat the last measured rate
+RATE_WINDOW = 1.0
+
+
+class RunStats:
+    def __init__(self, total=None, start_done=0, rate_window=RATE_WINDOW):
+        self.total = total
+        self.start_done = start_done
+        self.countries = {}
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.bytes_written = 0
+        # Optional callable returning bytes written so far (e.g. a writer's)
+        self.bytes_source = None
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.finished = None
+        # (time, records, bytes) at the previous snapshot, for current rates
+        self.window = (self.started, 0, 0)
+        self.rate_window = rate_window
+        # (records/s, bytes/s) over the last full window
+        self.rates = None
+
+    def record(self, country, valid):
+        counts = self.countries.get(country)
+        if counts is None:
+            counts = self.countries[country] = [0, 0]
+        counts[0] += 1
+        if valid:
+            counts[1] += 1
+
+    def add_records(self, country, attempts, valid):
+        counts = self.countries.setdefault(country, [0, 0])
+        counts[0] += attempts
+        counts[1] += valid
+
+    def lap(self, phase):
+        # Charge the time since the previous lap to ``phase``
+        now = time.perf_counter()
+        self.times[phase] += now - self.last
+        self.last = now
+
+    def reset_lap(self):
+        self.last = time.perf_counter()
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def attempts(self):
+        return sum(counts[0] for counts in self.countries.values())
+
+    @property
+    def valid(self):
+        return sum(counts[1] for counts in self.countries.values())
+
+    def snapshot(self):
+        now = self.finished or time.perf_counter()
+        if self.bytes_source is not None:
+            self.bytes_written = self.bytes_source()
+        elapsed = now - self.started
+        attempts, valid = self.attempts, self.valid
+        window_time, window_records, window_bytes = self.window
+        span = now - window_time
+        if self.finished:
+            self.rates = None
+        elif span >= self.rate_window and span > 0:
+            self.rates = ((attempts - window_records) / span, (self.bytes_written - window_bytes) / span)
+            self.window = (now, attempts, self.bytes_written)
+        if self.rates is not None:
+            rate, byte_rate = self.rates
+        else:
+            rate = attempts / elapsed if elapsed else 0.0
+            byte_rate = self.bytes_written / elapsed if elapsed else 0.0
+        done = self.start_done + attempts
+        eta = None
+        if self.total is not None and rate > 0:
+            eta = max(self.total - done, 0) / rate
+        return {
+            "done": done,
+            "total": self.total,
+            "attempts": attempts,
+            "valid": valid,
+            "invalid": attempts - valid,
+            "elapsed": round(elapsed, 3),
+            "records_per_sec": round(rate, 1),
+            "avg_records_per_sec": round(attempts / elapsed, 1) if elapsed else 0.0,
+            "bytes_written": self.bytes_written,
+            "write_bytes_per_sec": round(byte_rate, 1),
+            "eta": round(eta, 1) if eta is not None else None,
+            "phase_seconds": {phase: round(seconds, 3) for phase, seconds in self.times.items()},
+            "countries": {
+                country: {"attempts": a, "valid": v, "invalid": a - v, "yield": round(v / a, 4) if a else None}
+                for country, (a, v) in sorted(self.countries.items())
+            },
+        }
+
+    def dump(self, path):
+        with open(path, mode="w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write("\n")
+
+
+def format_stats(snapshot):
+    """One-line summary of a snapshot for logs and headless runs."""
+    done = f"{snapshot['done']}/{snapshot['total']}" if snapshot["total"] is not None else str(snapshot["done"])
+    line = (f"{done} records, {snapshot['invalid']} invalid, {snapshot['records_per_sec']:.0f}/s, "
+            f"{snapshot['write_bytes_per_sec'] / 1e6:.2f} MB/s written")
+    if snapshot["eta"] is not None:
+        line += f", ETA {snapshot['eta']:.0f}s"
+    low = [f"{country} {counts['yield']:.0%}" for country, counts in snapshot["countries"].items()
+           if counts["yield"] is not None and counts["yield"] < 1]
+    if low:
+        line += f", yield {' '.join(low)}"
+    return line
+
+
+def instrument(records, stats, on_report=None, interval=1.0):
+    """Pass ``(country, name, phone)`` records through while counting them.
+
+    Time spent producing a record is charged to "generate" and time the
+    consumer spends on it to "write". ``on_report(stats)`` is called at most
+    every ``interval`` seconds.
+    """
+    stats.reset_lap()
+    next_report = stats.last + interval
+    for record in records:
+        stats.lap("generate")
+        stats.record(record[0], bool(record[2]))
+        yield record
+        stats.lap("write")
+        if on_report is not None and stats.last >= next_report:
+            on_report(stats)
+            next_report = stats.last + interval
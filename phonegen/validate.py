@@ -0,0 +1,211 @@
+import re
+from functools import lru_cache
+
+import phonenumbers
+from phonenumbers import COUNTRY_CODE_TO_REGION_CODE, PhoneMetadata
+from phonenumbers.phonenumberutil import REGION_CODE_FOR_NON_GEO_ENTITY
+
+from phonegen.ranges import NUMBER_TYPES
+
+# E.164 strings ("+" and digits, which is what we generate and write) are
+# checked against per-country metadata compiled once: country code, leading
+# digits, possible lengths and national number patterns. This gives the same
+# answer as phonenumbers.parse + is_valid_number without the parse and the
+# metadata lookups per number. Anything else (spaces, national formats, a
+# national prefix after the country code) goes through phonenumbers itself.
+
+# Compiled checks kept per region / country code; there are ~250 regions
+REGION_CACHE_SIZE = 256
+
+# Numbers whose region has to be searched for (shared country codes such as
+# +1 or +7) remember their answer in a per-Validator LRU of this size
+REGION_LOOKUP_CACHE_SIZE = 1 << 16
+
+# Types checked before fixed line/mobile, in phonenumbers' number_type order
+SPECIAL_TYPES = ("premium_rate", "toll_free", "shared_cost", "voip", "personal_number", "pager", "uan", "voicemail")
+
+# phonenumbers rejects longer national numbers before validating
+MAX_NATIONAL_LENGTH = 17
+
+
+class _Desc:
+    def __init__(self, desc):
+        self.lengths = frozenset(desc.possible_length or ())
+        self.pattern = re.compile(desc.national_number_pattern)
+
+    def matches(self, national):
+        return (not self.lengths or len(national) in self.lengths) and self.pattern.fullmatch(national) is not None
+
+
+class RegionCheck:
+    """Precompiled validity check for the national numbers of one region."""
+
+    def __init__(self, region, metadata):
+        self.region = region
+        self.country_code = metadata.country_code
+        self.leading_digits = re.compile(metadata.leading_digits) if metadata.leading_digits else None
+        self.general = _Desc(metadata.general_desc)
+        self.by_type = {t: _Desc(desc) for t, desc in ((t, getattr(metadata, t)) for t in NUMBER_TYPES)
+                        if desc is not None and desc.national_number_pattern is not None}
+        self.types = list(self.by_type.values())
+        self.same_mobile_and_fixed_line = metadata.same_mobile_and_fixed_line_pattern
+
+    def is_valid(self, national):
+        return self.general.matches(national) and any(desc.matches(national) for desc in self.types)
+
+    def number_type(self, national):
+        """Line type name, as phonenumbers' number_type would classify it."""
+        if not self.general.matches(national):
+            return "unknown"
+        for number_type in SPECIAL_TYPES:
+            desc = self.by_type.get(number_type)
+            if desc is not None and desc.matches(national):
+                return number_type
+        fixed_line = self.by_type.get("fixed_line")
+        mobile = self.by_type.get("mobile")
+        if fixed_line is not None and fixed_line.matches(national):
+            if self.same_mobile_and_fixed_line or (mobile is not None and mobile.matches(national)):
+                return "fixed_line_or_mobile"
+            return "fixed_line"
+        if not self.same_mobile_and_fixed_line and mobile is not None and mobile.matches(national):
+            return "mobile"
+        return "unknown"
+
+
+@lru_cache(maxsize=REGION_CACHE_SIZE)
+def region_check(region):
+    if region == REGION_CODE_FOR_NON_GEO_ENTITY:
+        raise ValueError("Non-geographic numbers have no single region; use country_checks")
+    metadata = PhoneMetadata.metadata_for_region(region)
+    if metadata is None:
+        raise ValueError(f"Unknown region: {region}")
+    return RegionCheck(region, metadata)
+
+
+@lru_cache(maxsize=REGION_CACHE_SIZE)
+def country_checks(country_code):
+    """``(national_prefix_re, [RegionCheck, ...])`` for a country code, or None."""
+    regions = COUNTRY_CODE_TO_REGION_CODE.get(country_code)
+    if not regions:
+        return None
+    if regions[0] == REGION_CODE_FOR_NON_GEO_ENTITY:
+        metadata = PhoneMetadata.metadata_for_nongeo_region(country_code)
+        checks = [RegionCheck(REGION_CODE_FOR_NON_GEO_ENTITY, metadata)]
+    else:
+        metadata = PhoneMetadata.metadata_for_region(regions[0])
+        checks = [region_check(region) for region in regions]
+    # parse() strips a national prefix found after the country code, so
+    # those numbers are left to the slow path
+    prefix = metadata.national_prefix_for_parsing or metadata.national_prefix
+    return (re.compile(prefix) if prefix else None), checks
+
+
+def split_e164(phone):
+    """``(country_code, national_number)`` of a "+digits" string, else None."""
+    if len(phone) < 3 or phone[0] != "+" or not phone[1:].isdigit() or not phone.isascii():
+        return None
+    if phone[1] == "0":
+        return None  # no country code starts with 0
+    for size in (1, 2, 3):
+        country_code = int(phone[1:1 + size])
+        if country_code in COUNTRY_CODE_TO_REGION_CODE:
+            return country_code, phone[1 + size:]
+    return None
+
+
+class Validator:
+    """Validates phone number strings, using compiled checks for E.164 input."""
+
+    def __init__(self, cache_size=REGION_LOOKUP_CACHE_SIZE):
+        self._search_region = lru_cache(maxsize=cache_size)(self._search_region)
+
+    def is_valid(self, phone, region=None):
+        """Same result as phonenumbers' is_valid_number (or
+        is_valid_number_for_region when ``region`` is given)."""
+        split = self._split(phone)
+        if split is None:
+            return self._slow_is_valid(phone, region)
+        national, checks = split
+        if region is not None:
+            check = next((c for c in checks if c.region == region), None)
+            return check is not None and check.is_valid(national)
+        check = self._region_check_for(checks, national)
+        return check is not None and check.is_valid(national)
+
+    def region_for(self, phone):
+        """Region code of a valid number ("001" for non-geographic ones)."""
+        split = self._split(phone)
+        if split is not None:
+            national, checks = split
+            check = self._region_check_for(checks, national)
+            return check.region if check is not None else None
+        try:
+            return phonenumbers.region_code_for_number(phonenumbers.parse(phone, None))
+        except phonenumbers.NumberParseException:
+            return None
+
+    def valid_region(self, phone, default_region=None):
+        """Region code of ``phone`` when it is valid, else None; one lookup
+        instead of is_valid plus region_for. Numbers without a leading "+"
+        are read as dialled in ``default_region``."""
+        split = self._split(phone)
+        if split is not None:
+            national, checks = split
+            check = self._region_check_for(checks, national)
+            return check.region if check is not None and check.is_valid(national) else None
+        try:
+            number = phonenumbers.parse(phone, default_region)
+        except phonenumbers.NumberParseException:
+            return None
+        return phonenumbers.region_code_for_number(number) if phonenumbers.is_valid_number(number) else None
+
+    def number_type(self, phone):
+        """Line type name such as "mobile" or "fixed_line" ("unknown" if invalid)."""
+        split = self._split(phone)
+        if split is not None:
+            national, checks = split
+            check = self._region_check_for(checks, national)
+            return check.number_type(national) if check is not None else "unknown"
+        try:
+            number = phonenumbers.parse(phone, None)
+        except phonenumbers.NumberParseException:
+            return "unknown"
+        return phonenumbers.PhoneNumberType.to_string(phonenumbers.number_type(number)).lower()
+
+    def _split(self, phone):
+        # (national_number, checks) when the fast path gives the exact
+        # phonenumbers answer, else None
+        split = split_e164(phone)
+        if split is None:
+            return None
+        country_code, national = split
+        national_prefix, checks = country_checks(country_code)
+        if not 2 <= len(national) <= MAX_NATIONAL_LENGTH or (national_prefix and national_prefix.match(national)):
+            return None
+        return national, checks
+
+    def _region_check_for(self, checks, national):
+        # Same order as phonenumbers: leading digits if the region has them,
+        # else the first region the number is valid in
+        if len(checks) == 1:
+            return checks[0]
+        return self._search_region(checks[0].country_code, national)
+
+    def _search_region(self, country_code, national):
+        _, checks = country_checks(country_code)
+        for check in checks:
+            if check.leading_digits is not None:
+                if check.leading_digits.match(national):
+                    return check
+            elif check.is_valid(national):
+                return check
+        return None
+
+    def _slow_is_valid(self, phone, region):
+        try:
+            number = phonenumbers.parse(phone, None)
+        except phonenumbers.NumberParseException:
+            return False
+        if region is None:
+            return phonenumbers.is_valid_number(number)
+        return phonenumbers.is_valid_number_for_region(number, region)
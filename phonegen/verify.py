@@ -0,0 +1,261 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from phonegen.stats import RunStats, format_stats
+
+# Bulk validation of existing phone lists, e.g. phones_output/*_phones.txt or
+# CSV/JSONL files from other sources, with the same rules as phonenumbers'
+# is_valid_number (phonegen.validate):
+#
+#   python -m phonegen.verify phones_output --valid ok.txt --invalid bad.txt
+#   python -m phonegen.verify contacts.csv --column mobile --region KH -w 8 --stats-json counts.json
+#
+# Inputs are read in blocks of whole lines that worker processes validate.
+# Blocks come back in order and every line is copied unchanged to the valid
+# or the invalid output, so at most a few blocks per worker are held in
+# memory however large the input is. Rows must be single lines (phonegen's
+# own outputs always are).
+
+BLOCK_SIZE = 1 << 22
+# Blocks queued per worker ahead of the one being written
+LOOKAHEAD = 2
+INPUT_FORMATS = ["txt", "csv", "jsonl"]
+# Counted under this region: invalid rows without a recognizable country code
+UNKNOWN_REGION = "ZZ"
+
+_validator = None
+
+
+def input_format(path, fmt=None):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in INPUT_FORMATS else "txt"
+
+
+def input_paths(paths):
+    # Files, or directories (every *_phones.txt inside), as UniqueIndex.load
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith("_phones.txt"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def read_blocks(f, block_size=BLOCK_SIZE):
+    """Read the binary file ``f`` in blocks that end on a line boundary."""
+    tail = b""
+    while True:
+        data = f.read(block_size)
+        if not data:
+            if tail:
+                yield tail
+            return
+        data = tail + data
+        cut = data.rfind(b"\n") + 1
+        if cut:
+            yield data[:cut]
+        tail = data[cut:]
+
+
+def _phones(lines, fmt, field):
+    # The number on every line, "" where there is none
+    if fmt == "csv":
+        for row in csv.reader(lines):
+            yield row[field].strip() if len(row) > field else ""
+    elif fmt == "jsonl":
+        for line in lines:
+            try:
+                yield str(json.loads(line).get(field) or "").strip()
+            except (ValueError, AttributeError):
+                yield ""
+    else:
+        # "name - phone" or just the phone, as phonegen writes them
+        for line in lines:
+            yield line.rpartition(" - ")[2].strip()
+
+
+def check_block(task):
+    """Validate one block of lines.
+
+    Returns ``(valid, invalid, counts)``: the valid and invalid lines as
+    bytes and ``{region: [rows, valid]}``. Blank lines are skipped.
+    """
+    global _validator
+    data, fmt, field, default_region = task
+    if _validator is None:
+        from phonegen.validate import Validator
+        _validator = Validator()
+    valid_region = _validator.valid_region
+    # surrogateescape keeps undecodable bytes as they were in the output
+    lines = data.decode("utf-8", errors="surrogateescape").split("\n")
+    if not lines[-1]:
+        lines.pop()
+    valid, invalid, counts = [], [], {}
+    for line, phone in zip(lines, _phones(lines, fmt, field)):
+        if not line.strip():
+            continue
+        region = valid_region(phone, default_region) if phone else None
+        if region is not None:
+            valid.append(line)
+            row_counts = counts.setdefault(region, [0, 0])
+            row_counts[1] += 1
+        else:
+            invalid.append(line)
+            row_counts = counts.setdefault(_invalid_region(phone, default_region), [0, 0])
+        row_counts[0] += 1
+    return _join(valid), _join(invalid), counts
+
+
+def _join(lines):
+    return "".join(line + "\n" for line in lines).encode("utf-8", errors="surrogateescape")
+
+
+def _invalid_region(phone, default_region):
+    # Main region of the number's country code, for the per-country counts
+    import phonenumbers
+    from phonegen.validate import split_e164
+    split = split_e164(phone)
+    if split is not None:
+        return phonenumbers.region_code_for_country_code(split[0])
+    return default_region or UNKNOWN_REGION
+
+
+def _csv_field(header, column, path):
+    names = next(csv.reader([header.decode("utf-8", errors="replace")]), [])
+    names = [name.strip() for name in names]
+    if column in names:
+        return names.index(column)
+    if column.isdigit():
+        return int(column)
+    raise ValueError(f"{path}: no column {column!r} in header ({', '.join(names)})")
+
+
+def _ordered(tasks, workers):
+    # Results of check_block in task order, with a bounded number in flight
+    if workers == 1:
+        yield from map(check_block, tasks)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(check_block, task))
+            if len(pending) > workers * LOOKAHEAD:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def verify_files(paths, valid_out=None, invalid_out=None, fmt=None, column="phone", default_region=None,
+                 workers=None, block_size=BLOCK_SIZE, stats=None, on_block=None):
+    """Validate every row of ``paths`` into two binary streams.
+
+    Valid rows are written to ``valid_out`` and invalid ones to
+    ``invalid_out`` (either may be None to drop them); the first CSV header
+    goes to both. ``column`` is the CSV column or JSON key holding the
+    number. ``on_block(stats)`` is called after each block. Returns the
+    RunStats with per-country rows (attempts) and valid counts.
+    """
+    stats = stats if stats is not None else RunStats()
+    workers = workers or os.cpu_count() or 1
+    outputs = [out for out in (valid_out, invalid_out) if out is not None]
+    header_written = False
+    for path in input_paths(paths):
+        path_format = input_format(path, fmt)
+        with open(path, mode="rb") as f:
+            field = column
+            if path_format == "csv":
+                header = f.readline()
+                field = _csv_field(header, column, path)
+                if not header_written:
+                    for out in outputs:
+                        out.write(header if header.endswith(b"\n") else header + b"\n")
+                    header_written = True
+            tasks = ((block, path_format, field, default_region) for block in read_blocks(f, block_size))
+            for valid, invalid, counts in _ordered(tasks, workers):
+                if valid_out is not None:
+                    valid_out.write(valid)
+                if invalid_out is not None:
+                    invalid_out.write(invalid)
+                for region, (rows, valid_rows) in counts.items():
+                    stats.add_records(region, rows, valid_rows)
+                stats.bytes_written += len(valid) + len(invalid)
+                if on_block is not None:
+                    on_block(stats)
+    stats.finish()
+    return stats
+
+
+def format_counts(snapshot):
+    """Per-country table of a verification run's snapshot."""
+    lines = [f"{'region':<8}{'rows':>12}{'valid':>12}{'invalid':>12}"]
+    for region, counts in snapshot["countries"].items():
+        lines.append(f"{region:<8}{counts['attempts']:>12}{counts['valid']:>12}{counts['invalid']:>12}")
+    lines.append(f"{'total':<8}{snapshot['attempts']:>12}{snapshot['valid']:>12}{snapshot['invalid']:>12}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="phonegen.verify", description="Validate existing phone lists in bulk.")
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="Files to check, or directories of *_phones.txt files")
+    parser.add_argument("-f", "--format", choices=INPUT_FORMATS, help="Input format (default: from the extension)")
+    parser.add_argument("--column", default="phone", help="CSV column (name or index) or JSON key of the number")
+    parser.add_argument("-r", "--region", type=str.upper, help="Region of numbers written without +country code")
+    parser.add_argument("--valid", default="-", metavar="PATH", help="Output for valid rows, '-' for stdout")
+    parser.add_argument("--invalid", metavar="PATH", help="Output for invalid rows (dropped if not given)")
+    parser.add_argument("-w", "--workers", type=int, default=0,
+                        help="Validate in this many processes (0 = one per CPU core)")
+    parser.add_argument("--stats-interval", type=float, metavar="SECONDS",
+                        help="Print progress and throughput to stderr this often")
+    parser.add_argument("--stats-json", metavar="FILE", help="Write the counts as JSON to FILE at the end")
+    args = parser.parse_args(argv)
+
+    if args.region:
+        from phonegen.registry import default_registry
+        if args.region not in default_registry():
+            parser.error(f"unknown region: {args.region}")
+    missing = [path for path in args.inputs if not os.path.exists(path)]
+    if missing:
+        parser.error(f"no such file: {', '.join(missing)}")
+
+    on_block = None
+    if args.stats_interval:
+        next_report = [time.perf_counter() + args.stats_interval]
+
+        def on_block(stats):
+            now = time.perf_counter()
+            if now >= next_report[0]:
+                print(format_stats(stats.snapshot()), file=sys.stderr, flush=True)
+                next_report[0] = now + args.stats_interval
+
+    valid_out = sys.stdout.buffer if args.valid == "-" else open(args.valid, mode="wb")
+    invalid_out = open(args.invalid, mode="wb") if args.invalid else None
+    try:
+        stats = verify_files(args.inputs, valid_out, invalid_out, args.format, args.column, args.region,
+                             args.workers or None, on_block=on_block)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        valid_out.flush()
+        if valid_out is not sys.stdout.buffer:
+            valid_out.close()
+        if invalid_out is not None:
+            invalid_out.close()
+    snapshot = stats.snapshot()
+    print(format_counts(snapshot), file=sys.stderr)
+    if args.stats_json:
+        stats.dump(args.stats_json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import pytest
+
+from phonegen.contacts import generate_contacts, iter_contact_chunks
+from phonegen.export import export_store, export_stores
+from phonegen.generate import GENERATE_ALL, Generate
+from phonegen.plan import BATCH_SIZE, make_plan
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+# Large exports are generated and written one chunk at a time; the chunks
+# must add up to the same rows as the whole run in one store.
+
+FIELDS = ["country", "name", "phone", "international"]
+
+
+def _rows(store):
+    return list(store.iter_rows(FIELDS))
+
+
+def test_plan_chunks_match_one_store():
+    plan = make_plan(quotas="KH=12000,TH=8000,US=5003")
+    whole = generate_contacts(Generate(seed=1016), "KH", GENERATE_ALL, "Auto", plan.total, plan=plan)
+    chunks = list(iter_contact_chunks(Generate(seed=1016), "KH", GENERATE_ALL, "Auto", plan.total, plan,
+                                      chunk_size=BATCH_SIZE))
+    assert [len(store) for store in chunks] == [10000, 10000, 5003]
+    assert [row for store in chunks for row in _rows(store)] == _rows(whole)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_export_stores_matches_export_store(tmp_path, fmt):
+    stores = list(iter_contact_chunks(Generate(seed=1016), "TH", "Thai", "Auto", 25000, chunk_size=BATCH_SIZE))
+    whole = generate_contacts(Generate(seed=1016), "TH", "Thai", "Auto", 0)
+    for store in stores:
+        whole.extend(store.iter_rows(["country", "name", "phone"]))
+    one, many = tmp_path / f"one.{fmt}", tmp_path / f"many.{fmt}"
+    assert export_store(whole, str(one), FIELDS) == 25000
+    assert export_stores(iter(stores), str(many), FIELDS) == 25000
+    if fmt == "parquet":
+        assert pq.read_table(many).to_pylist() == pq.read_table(one).to_pylist()
+    else:
+        assert many.read_bytes() == one.read_bytes()
+
+
+def test_export_stores_empty(tmp_path):
+    path = tmp_path / "empty.parquet"
+    assert export_stores(iter([generate_contacts(Generate(seed=1), "KH", "Khmer", "Auto", 0)]), str(path),
+                         FIELDS) == 0
+    assert pq.read_table(path).column_names == ["Country", "Name", "Phone", "International"]
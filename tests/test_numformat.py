@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+import phonenumbers
+import pytest
+
+from phonegen.numformat import NUMBER_FORMATS, format_number, format_numbers
+from phonegen.registry import default_registry
+
+# The compiled templates must format exactly like phonenumbers.format_number.
+# Numbers are a seeded sample per region: example numbers of several types
+# plus numbers generated from the region's space.
+
+SEED = 1020
+REGIONS = sorted(phonenumbers.SUPPORTED_REGIONS)
+NUMBER_TYPES = [phonenumbers.PhoneNumberType.FIXED_LINE, phonenumbers.PhoneNumberType.MOBILE,
+                phonenumbers.PhoneNumberType.TOLL_FREE, phonenumbers.PhoneNumberType.PREMIUM_RATE]
+PHONENUMBERS_FORMATS = {
+    "e164": phonenumbers.PhoneNumberFormat.E164,
+    "national": phonenumbers.PhoneNumberFormat.NATIONAL,
+    "international": phonenumbers.PhoneNumberFormat.INTERNATIONAL,
+    "rfc3966": phonenumbers.PhoneNumberFormat.RFC3966,
+}
+SAMPLED_REGIONS = 60
+PER_REGION = 10
+
+
+@pytest.fixture(scope="module")
+def numbers():
+    rng = random.Random(SEED)
+    phones = []
+    for region in REGIONS:
+        for number_type in NUMBER_TYPES:
+            example = phonenumbers.example_number_for_type(region, number_type)
+            if example is not None:
+                phones.append(phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164))
+    registry = default_registry()
+    for region in rng.sample(REGIONS, SAMPLED_REGIONS) + registry.countries:
+        space = registry.number_space(region)
+        if space and space.size:
+            phones.extend(space.sample(rng) for _ in range(PER_REGION))
+    return phones
+
+
+@pytest.mark.parametrize("number_format", NUMBER_FORMATS)
+def test_format_number_matches_phonenumbers(numbers, number_format):
+    for phone in numbers:
+        expected = phonenumbers.format_number(phonenumbers.parse(phone, None), PHONENUMBERS_FORMATS[number_format])
+        assert format_number(phone, number_format) == expected, phone
+
+
+@pytest.mark.parametrize("number_format", NUMBER_FORMATS)
+def test_format_numbers_matches_format_number(numbers, number_format):
+    # Same width per array, as generate_batch produces them
+    by_width = {}
+    for phone in numbers:
+        by_width.setdefault(len(phone), []).append(phone)
+    for phones in by_width.values():
+        formatted = format_numbers(np.array(phones, dtype="S"), number_format, as_bytes=True)
+        assert [f.decode("utf-8") for f in formatted.tolist()] == [format_number(p, number_format) for p in phones]
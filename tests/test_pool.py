@@ -0,0 +1,47 @@
+import io
+import json
+
+from phonegen.pool import generate_to_directory, generate_to_stream, resume_to_directory
+
+# generate_to_directory writes the same records as the streaming pool for
+# the same options, and a resumed run keeps them.
+
+RUN = dict(country="KH", language="Khmer", mode="Manual", count=5000, workers=2, chunk_size=1000, seed=1025)
+OPTIONS = dict(number_format="international", permute=True)
+
+
+def _names_dir(tmp_path):
+    names = tmp_path / "names"
+    names.mkdir()
+    (names / "khmer_first_names.txt").write_text("Dara\nSokha\n", encoding="utf-8")
+    (names / "khmer_last_names.txt").write_text("Chan\n", encoding="utf-8")
+    return str(names)
+
+
+def test_directory_matches_stream(tmp_path):
+    names_dir = _names_dir(tmp_path)
+    stream = io.BytesIO()
+    generate_to_stream(stream, fmt="txt", names_dir=names_dir, **RUN, **OPTIONS)
+    output = tmp_path / "out"
+    counts = generate_to_directory(output_dir=str(output), names_dir=names_dir, **RUN, **OPTIONS)
+    assert counts == {"KH": 5000}
+    text = (output / "KH_phones.txt").read_text(encoding="utf-8")
+    assert text.encode("utf-8") == stream.getvalue()
+    assert text.startswith(("Dara Chan - +855 ", "Sokha Chan - +855 "))
+
+
+def test_resume_keeps_options(tmp_path):
+    names_dir = _names_dir(tmp_path)
+    output, checkpoint_path = tmp_path / "out", str(tmp_path / "run.json")
+    generate_to_directory(output_dir=str(output), names_dir=names_dir, checkpoint_path=checkpoint_path,
+                          **RUN, **OPTIONS)
+    straight = (output / "KH_phones.txt").read_bytes()
+    # Put the checkpoint back to the end of the second chunk
+    with open(checkpoint_path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["records_done"] = 2000
+    data["sizes"]["KH_phones.txt"] = len(b"".join(straight.splitlines(keepends=True)[:2000]))
+    with open(checkpoint_path, mode="w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert resume_to_directory(checkpoint_path, workers=2) == {"KH": 3000}
+    assert (output / "KH_phones.txt").read_bytes() == straight
@@ -0,0 +1,35 @@
+import random
+
+import phonenumbers
+import pytest
+
+from phonegen.registry import default_registry
+
+# Regions that share a country code with others (CA under +1, GG and JE
+# under +44, ...) must only produce numbers that phonenumbers routes back to
+# them, not numbers of the regions listed before them.
+
+SEED = 1015
+SHARED = sorted(region for regions in phonenumbers.COUNTRY_CODE_TO_REGION_CODE.values() if len(regions) > 1
+                for region in regions if region in phonenumbers.SUPPORTED_REGIONS)
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return default_registry()
+
+
+@pytest.mark.parametrize("region", SHARED)
+def test_shared_code_numbers_belong_to_region(registry, region):
+    rng = random.Random(f"{SEED}-{region}")
+    space = registry.number_space(region)
+    for _ in range(50 if space.size else 0):
+        number = phonenumbers.parse(space.sample(rng), None)
+        assert phonenumbers.is_valid_number(number)
+        assert phonenumbers.region_code_for_number(number) == region
+
+
+def test_region_without_numbers_of_its_own(registry):
+    # Every number valid for EH starts with digits that MA, listed first
+    # under +212, claims
+    assert registry.number_space("EH").size == 0
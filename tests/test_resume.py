@@ -0,0 +1,41 @@
+import pytest
+
+from phonegen import cli
+from phonegen.control import RunControl
+
+# A run that is interrupted and resumed from its checkpoint writes the same
+# file as the same run left alone. Planned runs stop in the middle of a
+# batch, which the resumed run draws again.
+
+STOP_AFTER = 14321
+
+
+class StopAfter(RunControl):
+    # Cancels the run after STOP_AFTER records, like a Ctrl+C
+    def __init__(self, shared=False):
+        super().__init__(shared)
+        self.records = 0
+
+    def wait(self, on_pause=None, on_resume=None):
+        self.records += 1
+        if self.records == STOP_AFTER:
+            self.cancel()
+        return super().wait(on_pause, on_resume)
+
+
+@pytest.mark.parametrize("run", [
+    ["--country", "KH", "--count", "30000", "--unique"],
+    ["--quotas", "KH=12000,TH=8000,US=10000", "--unique"],
+    ["--quotas", "KH=12000,TH=8000,US=10000", "--unique", "--permute"],
+    ["--quotas", "KH=12000,TH=8000,US=10000", "--unique", "--plan-order", "group"],
+])
+def test_resume_matches_straight_run(tmp_path, monkeypatch, run):
+    run = run + ["--seed", "1022", "--format", "csv"]
+    straight, resumed, checkpoint = tmp_path / "straight.csv", tmp_path / "resumed.csv", tmp_path / "run.json"
+    assert cli.main(run + ["--output", str(straight)]) == 0
+    with monkeypatch.context() as m:
+        m.setattr(cli, "RunControl", StopAfter)
+        assert cli.main(run + ["--output", str(resumed), "--checkpoint", str(checkpoint)]) == 130
+    assert resumed.read_bytes() != straight.read_bytes()
+    assert cli.main(["--resume", str(checkpoint)]) == 0
+    assert resumed.read_bytes() == straight.read_bytes()
@@ -0,0 +1,39 @@
+import time
+
+from phonegen.stats import RunStats
+
+# Current rates are measured over at least RunStats.rate_window seconds, so
+# snapshots taken back to back (worker chunks arriving together) stay sane.
+
+
+def test_back_to_back_snapshots():
+    stats = RunStats(10_000_000, rate_window=0.2)
+    stats.started -= 1.0  # one second into the run
+    stats.window = (stats.started, 0, 0)
+    stats.add_records("KH", 1000, 1000)
+    stats.bytes_written = 20_000
+    first = stats.snapshot()
+    assert 900 < first["records_per_sec"] < 1100
+    # A chunk lands right after the first snapshot
+    stats.add_records("KH", 100_000, 100_000)
+    stats.bytes_written += 2_000_000
+    second = stats.snapshot()
+    assert second["records_per_sec"] == first["records_per_sec"]
+    assert second["write_bytes_per_sec"] == first["write_bytes_per_sec"]
+    assert second["done"] == 101_000
+
+
+def test_rate_before_first_window_is_run_average():
+    stats = RunStats(rate_window=60)
+    stats.started -= 2.0
+    stats.add_records("KH", 1000, 1000)
+    assert 400 < stats.snapshot()["records_per_sec"] < 600
+
+
+def test_rate_after_window():
+    stats = RunStats(rate_window=0.05)
+    stats.add_records("KH", 10, 10)
+    stats.snapshot()
+    time.sleep(0.1)
+    stats.add_records("KH", 1000, 1000)
+    assert stats.snapshot()["records_per_sec"] < 1000 / 0.1 * 1.01
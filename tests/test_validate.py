@@ -0,0 +1,92 @@
+import random
+
+import phonenumbers
+import pytest
+
+from phonegen.registry import default_registry
+from phonegen.validate import Validator
+
+# Validator's compiled checks must give phonenumbers' answers exactly. The
+# numbers are drawn with a fixed seed: example numbers of every region and
+# type, numbers generated from a sample of region spaces, and mutations of
+# both (a digit changed, dropped or added) that are mostly invalid.
+
+SEED = 1012
+REGIONS = sorted(phonenumbers.SUPPORTED_REGIONS)
+NUMBER_TYPES = [phonenumbers.PhoneNumberType.FIXED_LINE, phonenumbers.PhoneNumberType.MOBILE,
+                phonenumbers.PhoneNumberType.TOLL_FREE, phonenumbers.PhoneNumberType.VOIP]
+
+
+def _e164(number):
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+
+
+def _mutate(phone, rng):
+    digits = list(phone[1:])
+    i = rng.randrange(len(digits))
+    kind = rng.randrange(3)
+    if kind == 0:
+        digits[i] = rng.choice("0123456789")
+    elif kind == 1:
+        del digits[i]
+    else:
+        digits.insert(i, rng.choice("0123456789"))
+    return "+" + "".join(digits)
+
+
+@pytest.fixture(scope="module")
+def numbers():
+    rng = random.Random(SEED)
+    valid = []
+    for region in REGIONS:
+        for number_type in NUMBER_TYPES:
+            example = phonenumbers.example_number_for_type(region, number_type)
+            if example is not None:
+                valid.append(_e164(example))
+    registry = default_registry()
+    for region in rng.sample(REGIONS, 40) + registry.countries:
+        space = registry.number_space(region)
+        if space and space.size:
+            valid.extend(space.sample(rng) for _ in range(25))
+    mutated = [_mutate(phone, rng) for phone in valid for _ in range(2)]
+    return valid + mutated + ["+", "+0", "+1", "+999123456", "+85596", "+8559612345678901234"]
+
+
+def _expected(phone):
+    try:
+        return phonenumbers.parse(phone, None)
+    except phonenumbers.NumberParseException:
+        return None
+
+
+def test_is_valid_matches_phonenumbers(numbers):
+    validator = Validator()
+    for phone in numbers:
+        number = _expected(phone)
+        assert validator.is_valid(phone) == (number is not None and phonenumbers.is_valid_number(number)), phone
+
+
+def test_region_matches_phonenumbers(numbers):
+    validator = Validator()
+    for phone in numbers:
+        number = _expected(phone)
+        if number is None or not phonenumbers.is_valid_number(number):
+            assert validator.valid_region(phone) is None, phone
+            continue
+        region = phonenumbers.region_code_for_number(number)
+        assert validator.region_for(phone) == region, phone
+        assert validator.valid_region(phone) == region, phone
+
+
+def test_is_valid_for_region_matches_phonenumbers(numbers):
+    validator = Validator()
+    rng = random.Random(SEED)
+    for phone in numbers:
+        number = _expected(phone)
+        if number is None:
+            continue
+        for region in (phonenumbers.region_code_for_number(number), rng.choice(REGIONS)):
+            if region is None:
+                continue
+            expected = phonenumbers.is_valid_number_for_region(number, region)
+            assert validator.is_valid(phone, region) == expected, (phone, region)